@@ -46,7 +46,7 @@ class AdbWorker(QObject):
             )
             output = process.stdout.strip()
             if output:
-                log.info(f"Output:\n{output}")
+                log.debug(f"Output:\n{output}")
                 self.log_message.emit(f"Output:\n{output}")
             return output
         except FileNotFoundError:
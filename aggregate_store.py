@@ -0,0 +1,205 @@
+"""
+Memory-mapped on-disk store for the processed daily totals and day bins.
+
+Several viewer or script processes can open the same file read-only and
+share its pages through the OS page cache instead of each parsing the
+database into private pandas objects. DataManager publishes the store next
+to the database (Steps.db -> Steps.agg) once it has loaded every year, and
+opens it instead of the database while the database file is unchanged.
+
+Usage:
+    python aggregate_store.py publish Steps.db [Steps.agg]
+    python aggregate_store.py info Steps.agg
+
+Layout (little-endian), arrays start on 64-byte boundaries:
+    header   128 bytes, see HEADER below
+    daily    int64[n_days]                  steps per day
+    bins     float64[n_days, bins_per_day]  steps per bin of each day, split in proportion to time
+"""
+import os
+import sys
+import mmap
+import struct
+import argparse
+import tempfile
+from datetime import date
+
+import numpy as np
+
+from logger import log
+
+MAGIC = b"MSAG"
+FORMAT_VERSION = 1
+# magic, format version, base day ordinal, day count, UTC offset (s), timezone name, data version,
+# source database size and mtime (ns), bin width in minutes
+HEADER = struct.Struct("<4sHqqi16s16sqqH")
+HEADER_SIZE = 128
+ALIGNMENT = 64
+STORE_SUFFIX = ".agg"
+
+
+def aligned(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def store_path_for(db_path):
+    return os.path.splitext(db_path)[0] + STORE_SUFFIX
+
+
+def source_state(db_path):
+    """(size, mtime in ns) of the database file, or None if it cannot be read."""
+    try:
+        st = os.stat(db_path)
+    except (OSError, TypeError):
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def publish_store(data_manager, path=None):
+    """
+    Writes the aggregates of a fully loaded DataManager to `path` (by default
+    next to its database). The file is written next to the target and renamed
+    over it, so readers only ever see a complete old or a complete new store.
+    """
+    path = path or store_path_for(data_manager.db_path)
+    daily = np.ascontiguousarray(data_manager.daily_array, dtype="<i8")
+    bins = np.ascontiguousarray(data_manager.bins, dtype="<f8")
+    offset = data_manager.tz.utcoffset(None)
+    size, mtime_ns = data_manager.source or (0, 0)
+    header = HEADER.pack(
+        MAGIC, FORMAT_VERSION,
+        data_manager.first_day.toordinal(), len(daily),
+        int(offset.total_seconds()), str(data_manager.tz).encode()[:16],
+        data_manager.data_version.encode()[:16],
+        size, mtime_ns, 24 * 60 // bins.shape[1],
+    )
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".agg-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(header.ljust(HEADER_SIZE, b"\0"))
+            f.write(daily.tobytes())
+            f.write(b"\0" * (aligned(f.tell()) - f.tell()))
+            f.write(bins.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)  # mkstemp creates the file owner-only
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    log.info(f"Published {len(daily):,} days to {path} (data version {data_manager.data_version})")
+    return path
+
+
+class AggregateStore:
+    """
+    Read-only, zero-copy view of a published store. Arrays are NumPy views into
+    the mapping; DataManager.open_store() puts them behind its usual accessors.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.inode = os.fstat(f.fileno()).st_ino
+        try:
+            (magic, format_version, base_ordinal, n_days, utc_offset, tz_name, data_version,
+             source_size, source_mtime_ns, bin_minutes) = HEADER.unpack_from(self.mm, 0)
+        except struct.error:
+            magic = format_version = None
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            self.mm.close()
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} aggregate store")
+        self.base_day = date.fromordinal(base_ordinal)
+        self.utc_offset = utc_offset
+        self.tz_name = tz_name.rstrip(b"\0").decode()
+        self.data_version = data_version.rstrip(b"\0").decode()
+        self.source = (source_size, source_mtime_ns)
+        self.bin_minutes = bin_minutes
+        self.daily = np.frombuffer(self.mm, dtype="<i8", count=n_days, offset=HEADER_SIZE)
+        bins_per_day = 24 * 60 // bin_minutes
+        bins_offset = aligned(HEADER_SIZE + self.daily.nbytes)
+        self.bins = np.frombuffer(self.mm, dtype="<f8", count=n_days * bins_per_day,
+                                  offset=bins_offset).reshape(n_days, bins_per_day)
+
+    def is_current(self, db_path, utc_offset):
+        """True if the store was published from the database file as it is now, in the same UTC offset."""
+        return self.source == source_state(db_path) and self.utc_offset == utc_offset
+
+    def is_stale(self):
+        """True once a writer has published a newer file at the same path."""
+        try:
+            return os.stat(self.path).st_ino != self.inode
+        except FileNotFoundError:
+            return False
+
+    def reopen(self):
+        """
+        Returns a store for the current file, or self if nothing was published
+        since opening. The old store stays usable, so views taken from it remain
+        valid; its mapping is released once it and its views are dropped.
+        """
+        if not self.is_stale():
+            return self
+        return AggregateStore(self.path)
+
+    def close(self):
+        # Our own views must be dropped before the mapping can be closed.
+        self.daily = self.bins = None
+        try:
+            self.mm.close()
+        except BufferError:
+            # A caller still holds a view; the mapping is released when the last one is dropped.
+            pass
+
+
+def open_current_store(db_path, utc_offset):
+    """Opens the store published for `db_path` if it is still current, else returns None."""
+    path = store_path_for(db_path)
+    if not os.path.exists(path):
+        return None
+    try:
+        store = AggregateStore(path)
+    except (OSError, ValueError) as e:
+        log.warning(f"Ignoring aggregate store {path}: {e}")
+        return None
+    if not store.is_current(db_path, utc_offset):
+        store.close()
+        return None
+    return store
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Publish or inspect a memory-mapped aggregate store.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    publish = commands.add_parser("publish", help="process a database and publish its store")
+    publish.add_argument("db_path")
+    publish.add_argument("store_path", nargs="?", help="default: the database path with an .agg suffix")
+    info = commands.add_parser("info", help="print a store's header")
+    info.add_argument("store_path")
+    args = parser.parse_args(argv)
+
+    if args.command == "publish":
+        from data_manager import DataManager
+
+        data_manager = DataManager(args.db_path, use_store=False)
+        data_manager.load_and_process()
+        if not data_manager.available_dates:
+            log.error("No data to publish.")
+            return 1
+        publish_store(data_manager, args.store_path)
+    else:
+        store = AggregateStore(args.store_path)
+        print(f"Days:         {store.base_day} + {len(store.daily):,}")
+        print(f"Bins:         {store.bin_minutes} minutes")
+        print(f"Timezone:     {store.tz_name} (UTC{store.utc_offset / 3600:+g}h)")
+        print(f"Data version: {store.data_version}")
+        print(f"Total steps:  {int(store.daily.sum()):,}")
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
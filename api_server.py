@@ -0,0 +1,246 @@
+"""
+Read-only local HTTP/JSON API over the DataManager aggregates.
+
+Usage: python api_server.py Steps.db [--host 127.0.0.1] [--port 8765]
+
+Endpoints:
+    GET /version
+    GET /day/YYYY-MM-DD[?resolution=60|30|15|5]
+    GET /month/YYYY-MM
+    GET /year/YYYY
+    GET /range?start=YYYY-MM-DD&end=YYYY-MM-DD
+
+Every response carries an ETag derived from the data version, and rendered
+bodies are cached in memory until that version changes. The database is
+reloaded in the background when its file changes, e.g. after a new sync.
+"""
+import sys
+import json
+import argparse
+import threading
+from collections import OrderedDict
+from datetime import date
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+from aggregate_store import source_state
+from charts import month_days
+from data_manager import DataManager, DAY_RESOLUTIONS
+from logger import log
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_RANGE_DAYS = 366 * 20
+MAX_CACHE_ENTRIES = 256
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_day(text):
+    try:
+        return date.fromisoformat(text)
+    except (TypeError, ValueError):
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"Invalid date: {text!r}")
+
+
+class StepApi:
+    """
+    Routes API paths to JSON bodies and caches them per data version.
+
+    Bodies are cached under the parsed route, so query strings the API does
+    not read cannot create new entries, and only the most recently used
+    MAX_CACHE_ENTRIES are kept. Before each request the database file is
+    checked; a changed file is reloaded on a background thread while the
+    previous version is still served, and swapped in once it is ready.
+    """
+
+    def __init__(self, data_manager):
+        self.lock = threading.Lock()
+        self.cache = OrderedDict()
+        self.reload_thread = None
+        self.swap(data_manager)
+
+    def swap(self, data_manager):
+        """Serves freshly loaded data and drops every cached body. Called with the lock held."""
+        self.data_manager = data_manager
+        self.version = data_manager.data_version
+        self.source = data_manager.source or source_state(data_manager.db_path)
+        self.cache.clear()
+
+    def reload_if_changed(self):
+        """Starts a background reload if the database file changed since it was loaded. Called with the lock held."""
+        if self.reload_thread is not None and self.reload_thread.is_alive():
+            return
+        state = source_state(self.data_manager.db_path)
+        if state is None or state == self.source:
+            return
+        # Recorded up front, so a reload that finds no data is not retried until the file changes again.
+        self.source = state
+        log.info(f"{self.data_manager.db_path} changed, reloading")
+        self.reload_thread = threading.Thread(target=self.reload, args=(self.data_manager.db_path,),
+                                              name="StepApiReload", daemon=True)
+        self.reload_thread.start()
+
+    def reload(self, db_path):
+        data_manager = DataManager(db_path)
+        data_manager.load_and_process()
+        if not data_manager.available_dates:
+            # Possibly caught mid-write; the next change to the file triggers another attempt.
+            log.warning("Reload found no data, still serving the previous version")
+            return
+        with self.lock:
+            self.swap(data_manager)
+        log.info(f"Serving data version {data_manager.data_version}")
+
+    @property
+    def etag(self):
+        return f'"{self.version}"'
+
+    def get(self, target):
+        """Returns (status, body, etag) for a request target such as '/day/2024-05-01'."""
+        with self.lock:
+            self.reload_if_changed()
+            try:
+                key = self.parse(target)
+            except ApiError as e:
+                return e.status, json.dumps({"error": str(e)}).encode(), None
+            body = self.cache.get(key)
+            if body is None:
+                body = json.dumps(self.render(key), separators=(",", ":")).encode()
+                self.cache[key] = body
+                if len(self.cache) > MAX_CACHE_ENTRIES:
+                    self.cache.popitem(last=False)
+            else:
+                self.cache.move_to_end(key)
+            return HTTPStatus.OK, body, self.etag
+
+    def parse(self, target):
+        """Validates a request target and reduces it to a normalised cache key."""
+        url = urlsplit(target)
+        parts = [part for part in url.path.split("/") if part]
+        query = parse_qs(url.query)
+        if parts == ["version"]:
+            return ("version",)
+        if len(parts) == 2 and parts[0] == "day":
+            resolution = query.get("resolution", ["60"])[0]
+            if not resolution.isdigit() or int(resolution) not in DAY_RESOLUTIONS:
+                raise ApiError(HTTPStatus.BAD_REQUEST, f"Resolution must be one of {DAY_RESOLUTIONS}")
+            return ("day", parse_day(parts[1]), int(resolution))
+        if len(parts) == 2 and parts[0] == "month":
+            try:
+                year, month = (int(part) for part in parts[1].split("-"))
+                month_days(year, month)
+            except ValueError:
+                raise ApiError(HTTPStatus.BAD_REQUEST, f"Invalid month: {parts[1]!r}")
+            return ("month", year, month)
+        if len(parts) == 2 and parts[0] == "year":
+            if not parts[1].isdigit():
+                raise ApiError(HTTPStatus.BAD_REQUEST, f"Invalid year: {parts[1]!r}")
+            return ("year", int(parts[1]))
+        if parts == ["range"]:
+            start, end = parse_day(query.get("start", [None])[0]), parse_day(query.get("end", [None])[0])
+            if start > end or (end - start).days >= MAX_RANGE_DAYS:
+                raise ApiError(HTTPStatus.BAD_REQUEST, "Range must be ordered and at most 20 years long")
+            return ("range", start, end)
+        raise ApiError(HTTPStatus.NOT_FOUND, f"Unknown endpoint: {url.path}")
+
+    def render(self, key):
+        kind, *args = key
+        if kind == "version":
+            return {"data_version": self.version}
+        return getattr(self, kind)(*args)
+
+    def day(self, day, bin_minutes):
+        bins = self.data_manager.day_bins(day, bin_minutes)
+        return {
+            "date": day.isoformat(),
+            "total": int(self.data_manager.daily_values(day, day)[0]),
+            "bin_minutes": bin_minutes,
+            "bins": [round(float(value), 1) for value in bins],
+        }
+
+    def month(self, year, month):
+        days = month_days(year, month)
+        values = self.data_manager.daily_values(days[0], days[-1])
+        return {"month": f"{year}-{month:02d}", "total": int(values.sum()),
+                "start": days[0].isoformat(), "days": values.tolist()}
+
+    def year(self, year):
+        stats = self.data_manager.stats.year(year)
+        return {"year": year, "total": stats.total, "months": stats.monthly_totals}
+
+    def range(self, start, end):
+        values = self.data_manager.daily_values(start, end)
+        return {"start": start.isoformat(), "end": end.isoformat(), "total": int(values.sum()), "days": values.tolist()}
+
+
+def etag_matches(if_none_match, etag):
+    """If-None-Match check with weak comparison: `*` and W/ tags match too."""
+    for tag in (if_none_match or "").split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class StepApiHandler(BaseHTTPRequestHandler):
+    server_version = "MIUIStepsAPI/1.0"
+
+    def do_GET(self):
+        status, body, etag = self.server.api.get(self.path)
+        if status == HTTPStatus.OK and etag_matches(self.headers.get("If-None-Match"), etag):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if status == HTTPStatus.OK:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        log.debug(f"API {self.address_string()} {format % args}")
+
+
+def make_server(data_manager, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Creates (but does not start) the API server. Port 0 picks a free port."""
+    server = ThreadingHTTPServer((host, port), StepApiHandler)
+    server.daemon_threads = True
+    server.api = StepApi(data_manager)
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve step aggregates as JSON over HTTP.")
+    parser.add_argument("db_path")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args(argv)
+
+    data_manager = DataManager(args.db_path)
+    data_manager.load_and_process()
+    if not data_manager.available_dates:
+        log.error("No data to serve.")
+        return 1
+    server = make_server(data_manager, args.host, args.port)
+    log.info(f"Serving step data on http://{args.host}:{server.server_address[1]}/ (data version {data_manager.data_version})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,11 @@
-from datetime import datetime, timedelta
-import pandas as pd
+from datetime import date
 import matplotlib.dates as mdates
 
 from PyQt6.QtCore import QThread, QObject, pyqtSignal, QDate
 
-from data_manager import DataManager, DataWorker
-
-ENGLISH_MONTHS_FULL = ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December"]
-ENGLISH_MONTHS_ABBR = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+from data_manager import DataManager, DataWorker, YearLoadWorker, DAY_RESOLUTIONS
+from charts import ENGLISH_MONTHS_FULL, ENGLISH_WEEKDAYS_ABBR, month_days, calendar_cell_date
+from render_pipeline import RenderPipeline
 
 class AppController(QObject):
     def __init__(self, view):
@@ -16,12 +14,19 @@ class AppController(QObject):
         self.data_manager = DataManager(None)
         self.thread = None
         self.worker = None
+        # Years are loaded on a worker into a copy of the DataManager, one batch at a time.
+        self.year_thread = None
+        self.year_worker = None
+        self.loading_years = set()
+        self.pending_years = set()
+        self.render_pipeline = RenderPipeline(self)
+        self.render_pipeline.finished.connect(self.on_rendered)
 
     def load_database(self, db_path):
         self.view.set_ui_enabled(False)
         self.view.status_label.setText(f"Loading {db_path}...")
         self.thread = QThread()
-        self.worker = DataWorker(db_path)
+        self.worker = DataWorker(db_path, lazy=True)
         self.worker.moveToThread(self.thread)
         self.thread.started.connect(self.worker.run)
         self.worker.finished.connect(self.on_loading_finished)
@@ -33,38 +38,50 @@ class AppController(QObject):
 
     def on_loading_finished(self, data_manager):
         self.data_manager = data_manager
-        if not data_manager.db_path or self.data_manager.df.empty:
+        self.pending_years.clear()
+        if not data_manager.db_path or not data_manager.available_dates:
             self.view.status_label.setText("Failed to load data or DB is empty.")
             self.view.set_ui_enabled(True)
-            for view_dict in [self.view.day_view, self.view.month_view, self.view.year_view]:
-                view_dict['canvas'].figure.clear()
-                view_dict['canvas'].draw()
+            for page, view_dict in enumerate(self.page_views()):
+                self.render_pipeline.invalidate(page)
+                view_dict["chart"].clear()
             return
-        self.view.status_label.setText(f"Loaded successfully from {data_manager.db_path}")
+        self.show_load_status(f"Loaded successfully from {data_manager.db_path}")
         self.populate_controls()
         self.view.set_ui_enabled(True)
         self.draw_plots()
 
+    def show_load_status(self, message):
+        """Shows `message` with the cleaning totals of every year loaded so far."""
+        report = self.data_manager.clean_report
+        if report.rows_dropped or report.clipped:
+            message += f" ({report.rows_dropped:,} invalid, duplicate or overlapping rows removed, {report.clipped:,} clipped)"
+        self.view.status_label.setText(message)
+
     def on_loading_error(self, err_msg):
         self.view.status_label.setText(f"Error: {err_msg}")
         self.view.set_ui_enabled(True)
 
     def populate_controls(self):
-        if self.data_manager.df.empty: return
+        if not self.data_manager.available_dates: return
         view = self.view
-        controls_to_block = [view.month_year_combo, view.year_year_combo, view.day_date_edit, view.month_month_combo]
+        controls_to_block = [view.month_year_combo, view.year_year_combo, view.calendar_year_combo,
+                             view.day_date_edit, view.month_month_combo]
         for control in controls_to_block:
             control.blockSignals(True)
 
-        years = sorted(self.data_manager.yearly.index.astype(str))
+        years = [str(year) for year in self.data_manager.years]
         view.month_year_combo.clear()
         view.month_year_combo.addItems(years)
         view.year_year_combo.clear()
         view.year_year_combo.addItems(years)
+        view.calendar_year_combo.clear()
+        view.calendar_year_combo.addItems(years)
 
         if years:
             view.month_year_combo.setCurrentText(years[-1])
             view.year_year_combo.setCurrentText(years[-1])
+            view.calendar_year_combo.setCurrentText(years[-1])
         if self.data_manager.available_dates:
             last_date = self.data_manager.available_dates[-1]
             view.day_date_edit.setDate(QDate(last_date.year, last_date.month, last_date.day))
@@ -74,91 +91,184 @@ class AppController(QObject):
             control.blockSignals(False)
 
     def draw_plots(self, _=None):
-        if self.data_manager.df.empty or not self.view.centralWidget().isVisible():
+        if not self.data_manager.available_dates or not self.view.centralWidget().isVisible():
             return
         current_index = self.view.stack.currentIndex()
+        self.ensure_visible_year(current_index)
         if current_index == 0: self.draw_day_plot()
         elif current_index == 1: self.draw_month_plot()
         elif current_index == 2: self.draw_year_plot()
+        elif current_index == 3: self.draw_calendar_plot()
+
+    def ensure_visible_year(self, page_index):
+        """Starts reading the year shown on the given page if it is not loaded yet."""
+        if page_index == 0:
+            year = self.view.day_date_edit.date().year()
+        else:
+            combo = [self.view.month_year_combo, self.view.year_year_combo, self.view.calendar_year_combo][page_index - 1]
+            if not combo.currentText(): return
+            year = int(combo.currentText())
+        # Streaks run across years, so the year page's stats panel needs the whole history.
+        self.request_years(self.data_manager.row_years if page_index == 2 else [year])
+
+    def request_years(self, years):
+        """
+        Loads the given years on a worker thread if they are not loaded yet. The
+        views keep drawing the current DataManager and are redrawn once the
+        years are in. Returns True while any of them is still loading.
+        """
+        data_manager = self.data_manager
+        missing = {year for year in years if year in data_manager.row_years and year not in data_manager.loaded_years}
+        self.pending_years |= missing - self.loading_years
+        if self.pending_years and self.year_worker is None:
+            self.start_year_load()
+        return bool(missing)
+
+    def start_year_load(self):
+        years = sorted(self.pending_years)
+        self.loading_years, self.pending_years = set(years), set()
+        self.view.status_label.setText(f"Loading {', '.join(map(str, years))} from {self.data_manager.db_path}...")
+        self.year_thread = QThread()
+        self.year_worker = YearLoadWorker(self.data_manager, years)
+        self.year_worker.moveToThread(self.year_thread)
+        self.year_thread.started.connect(self.year_worker.run)
+        self.year_worker.finished.connect(self.on_years_loaded)
+        self.year_worker.error.connect(self.on_year_load_error)
+        for signal in (self.year_worker.finished, self.year_worker.error):
+            signal.connect(self.year_thread.quit)
+            signal.connect(self.year_worker.deleteLater)
+        self.year_thread.finished.connect(self.year_thread.deleteLater)
+        self.year_thread.start()
+
+    def on_years_loaded(self, data_manager):
+        base, years = self.year_worker.data_manager, self.year_worker.years
+        self.year_worker = None
+        self.loading_years = set()
+        if base is self.data_manager:
+            self.data_manager = data_manager
+            self.show_load_status(f"Loaded {', '.join(map(str, years))} from {data_manager.db_path}")
+            self.draw_plots()
+        elif base.db_path == self.data_manager.db_path:
+            # The DataManager was replaced while loading; ask again for what the views still miss.
+            self.draw_plots()
+        if self.pending_years and self.year_worker is None:
+            self.start_year_load()
+
+    def adopt_data_manager(self, data_manager):
+        """Switches to a copy with more years loaded elsewhere, e.g. by the export dialog, if it is of the same database."""
+        current = self.data_manager
+        if (data_manager.db_path, data_manager.source) != (current.db_path, current.source) \
+                or not data_manager.loaded_years > current.loaded_years:
+            return
+        self.data_manager = data_manager
+        self.show_load_status(f"Loaded all years from {data_manager.db_path}")
+        self.draw_plots()
+
+    def on_year_load_error(self, err_msg):
+        self.year_worker = None
+        self.loading_years = set()
+        self.view.status_label.setText(f"Error: {err_msg}")
+
+    def page_views(self):
+        return [self.view.day_view, self.view.month_view, self.view.year_view, self.view.calendar_view]
+
+    def render_page(self, page, kind, args):
+        """Queues a chart for the render thread; `args` are snapshotted before they leave the GUI thread."""
+        chart = self.page_views()[page]["chart"]
+        self.render_pipeline.submit(page, kind, args, *chart.render_size())
+
+    def clear_page(self, page):
+        self.render_pipeline.invalidate(page)
+        self.page_views()[page]["chart"].clear()
+
+    def on_rendered(self, result):
+        self.page_views()[result.page]["chart"].set_result(result)
 
     def draw_day_plot(self):
-        view = self.view.day_view
-        canvas, fig = view["canvas"], view["canvas"].figure
-        fig.clear()
-        ax = fig.add_subplot(111)
         sel_date = self.view.day_date_edit.date().toPyDate()
-        hourly_data = self.data_manager.hourly.get(sel_date, pd.Series(dtype=int))
-        all_hours = pd.Series(0, index=range(24))
-        hourly_data = all_hours.add(hourly_data, fill_value=0)
-        ax.bar(hourly_data.index, hourly_data.values, color="#4FC3F7", alpha=0.8)
-        ax.set_title(f"Hourly Steps for {sel_date.strftime('%Y-%m-%d')}", color="white")
-        ax.set_xticks(range(0, 24, 2))
-        total_steps = int(self.data_manager.daily.get(sel_date, 0))
+        bin_minutes = DAY_RESOLUTIONS[self.view.day_resolution_combo.currentIndex()]
+        self.render_page(0, "day", (sel_date, self.data_manager.day_bins(sel_date, bin_minutes), bin_minutes))
+        total_steps = int(self.data_manager.daily_values(sel_date, sel_date)[0])
         self.view.day_total_label.setText(f"Total Steps: {total_steps:,}")
-        self.finalize_plot(ax, fig, canvas, xlabel="Hour of the Day")
 
     def draw_month_plot(self):
-        view = self.view.month_view
-        canvas, fig = view["canvas"], view["canvas"].figure
-        fig.clear()
-        ax = fig.add_subplot(111)
         year_str = self.view.month_year_combo.currentText()
-        if not year_str: return
+        if not year_str:
+            self.clear_page(1)
+            return
         year, month = int(year_str), self.view.month_month_combo.currentIndex() + 1
-        start_date = datetime(year, month, 1).date()
-        next_month = start_date.replace(day=28) + timedelta(days=4)
-        end_date = next_month - timedelta(days=next_month.day)
-        date_range = pd.date_range(start=start_date, end=end_date).date
-        daily_data = self.data_manager.daily.reindex(date_range, fill_value=0)
-        ax.bar(daily_data.index, daily_data.values, color="#81C784", picker=5)
-        month_name = f"{ENGLISH_MONTHS_FULL[month - 1]} {year}"
-        ax.set_title(f"Daily Steps for {month_name}", color="white")
-        ax.xaxis.set_major_formatter(mdates.DateFormatter("%d"))
-        ax.xaxis.set_major_locator(mdates.DayLocator(interval=2))
-        fig.autofmt_xdate(rotation=0, ha="center")
-        total = int(daily_data.sum())
-        avg = int(daily_data[daily_data > 0].mean()) if total > 0 else 0
+        days = month_days(year, month)
+        self.render_page(1, "month", (year, month, self.data_manager.daily_values(days[0], days[-1])))
+        stats = self.data_manager.stats.year(year)
+        total, avg = stats.monthly_totals[month - 1], stats.monthly_means[month - 1]
         self.view.month_stats_label.setText(f"Total: {total:,} steps  |  Daily Avg: {avg:,} steps")
-        self.finalize_plot(ax, fig, canvas, xlabel="Day of Month")
 
     def draw_year_plot(self):
-        view = self.view.year_view
-        canvas, fig = view["canvas"], view["canvas"].figure
-        fig.clear()
-        ax = fig.add_subplot(111)
         year_str = self.view.year_year_combo.currentText()
-        if not year_str: return
+        if not year_str:
+            self.clear_page(2)
+            return
+        year = int(year_str)
+        stats = self.data_manager.stats.year(year)
+        self.render_page(2, "year", (year, stats.monthly_totals))
+        self.view.year_stats_label.setText(f"Total: {stats.total:,} steps  |  Monthly Avg: {stats.monthly_mean:,} steps")
+        self.view.year_details_label.setText(self.format_year_details(stats))
+
+    def draw_calendar_plot(self):
+        year_str = self.view.calendar_year_combo.currentText()
+        if not year_str:
+            self.clear_page(3)
+            return
         year = int(year_str)
-        monthly_data_for_year = self.data_manager.monthly[self.data_manager.monthly.index.str.startswith(year_str)]
-        steps = [monthly_data_for_year.get(f"{year}-{m:02d}", 0) for m in range(1, 13)]
-        ax.plot(ENGLISH_MONTHS_ABBR, steps, "-o", color="#FFB74D", markersize=8, markerfacecolor="#F57C00")
-        ax.set_title(f"Monthly Steps for {year}", color="white")
-        total = int(sum(steps))
-        avg = int(pd.Series(steps)[pd.Series(steps) > 0].mean()) if total > 0 else 0
-        self.view.year_stats_label.setText(f"Total: {total:,} steps  |  Monthly Avg: {avg:,} steps")
-        self.finalize_plot(ax, fig, canvas, xlabel="Month", grid=True)
-
-    def finalize_plot(self, ax, fig, canvas, xlabel="", ylabel="Steps", grid=False):
-        ax.set_xlabel(xlabel, color="white")
-        ax.set_ylabel(ylabel, color="white")
-        ax.tick_params(axis="x", colors="white")
-        ax.tick_params(axis="y", colors="white")
-        for spine in ax.spines.values():
-            spine.set_color("gray")
-        ax.set_facecolor("#212121")
-        fig.set_facecolor("#212121")
-        ax.grid(axis="y", linestyle="--", alpha=0.5)
-        if grid:
-            ax.grid(True, linestyle="--", alpha=0.5)
-        fig.tight_layout()
-        canvas.draw()
-
-    def on_pick_month_bar(self, event):
-        if not hasattr(event.artist, "get_x"): return
-        date_num = event.artist.get_x() + event.artist.get_width() / 2
+        self.render_page(3, "calendar", (year, self.data_manager.daily_values(date(year, 1, 1), date(year, 12, 31))))
+        stats = self.data_manager.stats.year(year)
+        best_day, best_steps = stats.best_day
+        best_text = f"{best_day.strftime('%b %d')} ({best_steps:,} steps)" if best_day else "-"
+        self.view.calendar_stats_label.setText(f"Active Days: {stats.active_days}  |  Best Day: {best_text}")
+
+    def format_year_details(self, stats):
+        """Summarises the cached records, percentiles and streaks for the year view's stats panel."""
+        if not stats.active_days:
+            return ""
+        streaks = self.data_manager.stats
+        best_day, best_day_steps = stats.best_day
+        best_week, best_week_steps = stats.best_week
+        best_month, best_month_steps = stats.best_month
+        weekday = max(range(7), key=lambda i: stats.weekday_means[i])
+        percentiles = "  ".join(f"P{p}: {v:,}" for p, v in stats.percentiles.items())
+        # Shown until the year loader has read the rest of the history and the page is redrawn.
+        partial = "" if self.data_manager.fully_loaded else " (loaded years only)"
+        return "\n".join([
+            f"Best Day: {best_day.strftime('%b %d')} ({best_day_steps:,})  |  "
+            f"Best Week: {best_week.strftime('%b %d')} ({best_week_steps:,})  |  "
+            f"Best Month: {ENGLISH_MONTHS_FULL[best_month - 1]} ({best_month_steps:,})",
+            f"Daily {percentiles}  |  Most Active: {ENGLISH_WEEKDAYS_ABBR[weekday]} ({stats.weekday_means[weekday]:,} avg)",
+            f"Goal ({streaks.goal:,}) Days: {stats.goal_days}  |  Longest Streak: {streaks.longest_streak.length} days  |  "
+            f"Current Streak: {streaks.current_streak.length} days{partial}",
+        ])
+
+    def on_click_calendar_cell(self, x, y):
+        year_str = self.view.calendar_year_combo.currentText()
+        if not year_str: return
+        date = calendar_cell_date(int(year_str), x, y)
+        if date is None: return
+        self.open_day(date)
+
+    def on_click_month_bar(self, x, y):
+        # Bars are centred on their day and 0.8 days wide.
+        day_num = round(x)
+        if abs(x - day_num) > 0.4 or y < 0: return
         try:
-            date = mdates.num2date(date_num).date()
-            self.view.day_date_edit.setDate(QDate(date.year, date.month, date.day))
-            self.view.stack.setCurrentIndex(0)
-        except (ValueError, TypeError):
-            pass
+            date = mdates.num2date(day_num).date()
+        except (ValueError, OverflowError):
+            return
+        if (str(date.year), date.month) != (self.view.month_year_combo.currentText(),
+                                            self.view.month_month_combo.currentIndex() + 1):
+            return
+        # Only clicks on the bar itself count, not the empty space above it.
+        if y > self.data_manager.daily_values(date, date)[0]: return
+        self.open_day(date)
+
+    def open_day(self, date):
+        self.view.day_date_edit.setDate(QDate(date.year, date.month, date.day))
+        self.view.stack.setCurrentIndex(0)
@@ -0,0 +1,133 @@
+"""
+Batch export of day, month and year charts to PNG files.
+
+Usage: python chart_export.py Steps.db OUTPUT_DIR [--start YYYY-MM-DD] [--end YYYY-MM-DD]
+"""
+import os
+import sys
+import argparse
+import multiprocessing
+from datetime import date
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from charts import init_render_worker, render_chart, month_days
+from logger import log
+
+CHART_KINDS = ("day", "month", "year")
+EXPORT_FIGSIZE = (8, 6)
+EXPORT_DPI = 100
+
+
+def build_export_tasks(data_manager, out_dir, start, end, kinds=CHART_KINDS):
+    """
+    Turns the aggregates into render tasks. Every task carries only the small
+    array its chart needs: 24 hourly bins, one value per day of a month or
+    12 monthly values.
+    """
+    tasks = []
+    if "day" in kinds:
+        for day in data_manager.available_dates:
+            if start <= day <= end:
+                path = os.path.join(out_dir, "day", f"{day:%Y-%m-%d}.png")
+                tasks.append(("day", path, (day, data_manager.day_bins(day, 60)), EXPORT_FIGSIZE, EXPORT_DPI))
+
+    months = [(y, m) for y in range(start.year, end.year + 1) for m in range(1, 13)
+              if (start.year, start.month) <= (y, m) <= (end.year, end.month)]
+    if "month" in kinds:
+        for year, month in months:
+            days = month_days(year, month)
+            values = data_manager.daily_values(days[0], days[-1])
+            if values.any():
+                path = os.path.join(out_dir, "month", f"{year}-{month:02d}.png")
+                tasks.append(("month", path, (year, month, values), EXPORT_FIGSIZE, EXPORT_DPI))
+
+    if "year" in kinds:
+        for year in range(start.year, end.year + 1):
+            values = np.array(data_manager.stats.year(year).monthly_totals)
+            if values.any():
+                path = os.path.join(out_dir, "year", f"{year}.png")
+                tasks.append(("year", path, (year, values), EXPORT_FIGSIZE, EXPORT_DPI))
+    return tasks
+
+
+def render_tasks(tasks, workers=None, progress=None):
+    """
+    Renders prepared tasks across a process pool and returns the written
+    paths. `progress(done, total)` is called as charts finish.
+    """
+    if not tasks:
+        return []
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    chunksize = max(1, len(tasks) // (workers * 4))
+    log.info(f"Exporting {len(tasks)} chart(s) with {workers} worker(s)")
+
+    # Spawn rather than fork: the parent may be a multi-threaded Qt process.
+    ctx = multiprocessing.get_context("spawn")
+    paths = []
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=init_render_worker) as pool:
+        for path in pool.map(render_chart, tasks, chunksize=chunksize):
+            paths.append(path)
+            if progress:
+                progress(len(paths), len(tasks))
+    log.info(f"Chart export complete: {len(paths)} file(s) written.")
+    return paths
+
+
+def export_charts(data_manager, out_dir, start, end, kinds=CHART_KINDS, workers=None, progress=None):
+    """Renders all charts for the date range to `out_dir` and returns the written paths."""
+    return render_tasks(build_export_tasks(data_manager, out_dir, start, end, kinds), workers, progress)
+
+
+class ExportWorker(QObject):
+    """
+    Worker thread for rendering a batch export without blocking the GUI.
+    It only receives prepared tasks, so it never touches the DataManager
+    the GUI thread keeps reading and loading into.
+    """
+
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(int)
+    error = pyqtSignal(str)
+
+    def __init__(self, tasks):
+        super().__init__()
+        self.tasks = tasks
+
+    def run(self):
+        try:
+            paths = render_tasks(self.tasks, progress=self.progress.emit)
+            self.finished.emit(len(paths))
+        except Exception as e:
+            log.error(f"Chart export failed: {e}")
+            self.error.emit(str(e))
+            self.finished.emit(0)
+
+
+def main(argv=None):
+    from data_manager import DataManager
+
+    parser = argparse.ArgumentParser(description="Export step charts as PNG files.")
+    parser.add_argument("db_path")
+    parser.add_argument("out_dir")
+    parser.add_argument("--start", type=date.fromisoformat, help="first day to export (default: first day with data)")
+    parser.add_argument("--end", type=date.fromisoformat, help="last day to export (default: last day with data)")
+    parser.add_argument("--kinds", nargs="+", choices=CHART_KINDS, default=list(CHART_KINDS))
+    parser.add_argument("--workers", type=int, help="number of render processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    data_manager = DataManager(args.db_path)
+    data_manager.load_and_process()
+    if not data_manager.available_dates:
+        log.error("No data to export.")
+        return 1
+    start = args.start or data_manager.available_dates[0]
+    end = args.end or data_manager.available_dates[-1]
+    export_charts(data_manager, args.out_dir, start, end, args.kinds, args.workers)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
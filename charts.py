@@ -0,0 +1,148 @@
+"""
+Qt-free chart builders shared by the GUI and the batch exporter.
+
+Each builder draws onto a matplotlib Figure from plain arrays and returns
+its main axes, so the same code serves the GUI's render thread and the
+offscreen Agg export processes.
+"""
+import os
+from datetime import date, timedelta
+
+import numpy as np
+import matplotlib
+import matplotlib.dates as mdates
+from matplotlib.figure import Figure
+
+ENGLISH_MONTHS_FULL = ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December"]
+ENGLISH_MONTHS_ABBR = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+ENGLISH_WEEKDAYS_ABBR = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+BACKGROUND = "#212121"
+
+
+def finalize_figure(ax, fig, xlabel="", ylabel="Steps", grid=False):
+    """Applies the dark theme and lays out the figure."""
+    ax.set_xlabel(xlabel, color="white")
+    ax.set_ylabel(ylabel, color="white")
+    ax.tick_params(axis="x", colors="white")
+    ax.tick_params(axis="y", colors="white")
+    for spine in ax.spines.values():
+        spine.set_color("gray")
+    ax.set_facecolor(BACKGROUND)
+    fig.set_facecolor(BACKGROUND)
+    ax.grid(axis="y", linestyle="--", alpha=0.5)
+    if grid:
+        ax.grid(True, linestyle="--", alpha=0.5)
+    fig.tight_layout()
+
+
+def month_days(year, month):
+    """Returns every date of the given month."""
+    start = date(year, month, 1)
+    next_month = start.replace(day=28) + timedelta(days=4)
+    return [start + timedelta(days=i) for i in range((next_month - timedelta(days=next_month.day)).day)]
+
+
+def draw_day(fig, day, binned_steps, bin_minutes=60):
+    """
+    Bars for one day; `binned_steps` holds one value per `bin_minutes` bin.
+    Bins are centred so that each hour's bins span the hour's tick.
+    """
+    ax = fig.add_subplot(111)
+    width = bin_minutes / 60
+    x = np.arange(len(binned_steps)) * width - 0.5 + width / 2
+    ax.bar(x, binned_steps, width=width * 0.8, color="#4FC3F7", alpha=0.8)
+    label = "Hourly Steps" if bin_minutes == 60 else f"Steps per {bin_minutes} min"
+    ax.set_title(f"{label} for {day.strftime('%Y-%m-%d')}", color="white")
+    ax.set_xticks(range(0, 24, 2))
+    finalize_figure(ax, fig, xlabel="Hour of the Day")
+    return ax
+
+
+def draw_month(fig, year, month, daily_steps):
+    """Daily bars for one month; `daily_steps` holds one value per day."""
+    ax = fig.add_subplot(111)
+    ax.bar(month_days(year, month), daily_steps, color="#81C784")
+    ax.set_title(f"Daily Steps for {ENGLISH_MONTHS_FULL[month - 1]} {year}", color="white")
+    ax.xaxis.set_major_formatter(mdates.DateFormatter("%d"))
+    ax.xaxis.set_major_locator(mdates.DayLocator(interval=2))
+    fig.autofmt_xdate(rotation=0, ha="center")
+    finalize_figure(ax, fig, xlabel="Day of Month")
+    return ax
+
+
+def draw_year(fig, year, monthly_steps):
+    """Monthly line for one year; `monthly_steps` holds 12 values."""
+    ax = fig.add_subplot(111)
+    ax.plot(ENGLISH_MONTHS_ABBR, monthly_steps, "-o", color="#FFB74D", markersize=8, markerfacecolor="#F57C00")
+    ax.set_title(f"Monthly Steps for {year}", color="white")
+    finalize_figure(ax, fig, xlabel="Month", grid=True)
+    return ax
+
+
+def calendar_grid(year, daily_steps):
+    """
+    Lays out one value per day of `year` on a weekday x week grid, masking
+    the cells that fall outside the year.
+    """
+    offset = date(year, 1, 1).weekday()
+    cells = np.arange(len(daily_steps)) + offset
+    grid = np.ma.masked_all((7, (offset + len(daily_steps) + 6) // 7), dtype=float)
+    grid[cells % 7, cells // 7] = daily_steps
+    return grid
+
+
+def calendar_cell_date(year, x, y):
+    """Maps heatmap data coordinates back to a date, or None outside the year."""
+    start = date(year, 1, 1)
+    day_index = int(round(x)) * 7 + int(round(y)) - start.weekday()
+    if not 0 <= day_index < (date(year + 1, 1, 1) - start).days:
+        return None
+    return start + timedelta(days=day_index)
+
+
+def draw_calendar(fig, year, daily_steps):
+    """
+    Calendar heatmap for one year; `daily_steps` holds one value per day.
+    All days are drawn by a single image artist.
+    """
+    ax = fig.add_subplot(111)
+    cmap = matplotlib.colormaps["YlGn"].with_extremes(bad=BACKGROUND)
+    image = ax.imshow(calendar_grid(year, daily_steps), aspect="auto", cmap=cmap,
+                      interpolation="nearest", vmin=0)
+    offset = date(year, 1, 1).weekday()
+    month_starts = [(date(year, m, 1) - date(year, 1, 1)).days for m in range(1, 13)]
+    ax.set_xticks([(d + offset) // 7 for d in month_starts], ENGLISH_MONTHS_ABBR)
+    ax.set_yticks(range(7), ENGLISH_WEEKDAYS_ABBR)
+    ax.set_title(f"Daily Steps in {year}", color="white")
+    colorbar = fig.colorbar(image, ax=ax, orientation="horizontal", fraction=0.08, pad=0.12)
+    colorbar.ax.tick_params(colors="white")
+    colorbar.outline.set_edgecolor("gray")
+    finalize_figure(ax, fig, ylabel="")
+    ax.grid(False)
+    return ax
+
+
+CHART_BUILDERS = {"day": draw_day, "month": draw_month, "year": draw_year, "calendar": draw_calendar}
+
+
+def init_render_worker():
+    """Process pool initializer: render offscreen only."""
+    matplotlib.use("Agg")
+
+
+def render_chart(task):
+    """
+    Renders one export task to a PNG and returns its path. A task is
+    (kind, path, args, figsize, dpi) where `args` are the builder arguments.
+    """
+    kind, path, args, figsize, dpi = task
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = Figure(figsize=figsize, dpi=dpi)
+    FigureCanvasAgg(fig)
+    CHART_BUILDERS[kind](fig, *args)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    fig.savefig(path, facecolor=fig.get_facecolor())
+    return path
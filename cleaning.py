@@ -0,0 +1,121 @@
+"""
+Duplicate and overlap resolution for StepsTable intervals.
+
+Re-syncs and multiple step sources can write the same interval twice or
+intervals that overlap, which makes a plain sum of `_steps` count some
+steps twice. `clean_intervals` sorts the rows once by (begin, end) and then
+resolves everything with linear NumPy passes:
+
+* rows longer than `MAX_INTERVAL_MS` are dropped: no step record spans
+  more than a day, so these carry a corrupt end time that would otherwise
+  stretch the day range to years;
+* rows with the same begin and end collapse into one, keeping the largest
+  step count;
+* rows that lie entirely inside time already covered by earlier rows are
+  dropped;
+* rows that start inside covered time are clipped to start where that
+  coverage ends, and their steps are scaled to the part that remains.
+"""
+from dataclasses import dataclass, astuple
+
+import numpy as np
+import pandas as pd
+
+MAX_INTERVAL_MS = 24 * 60 * 60 * 1000
+
+
+@dataclass
+class CleanReport:
+    rows_in: int = 0
+    too_long: int = 0
+    duplicates: int = 0
+    contained: int = 0
+    clipped: int = 0
+    steps_removed: int = 0
+
+    @property
+    def rows_dropped(self):
+        return self.too_long + self.duplicates + self.contained
+
+    def __add__(self, other):
+        return CleanReport(*(a + b for a, b in zip(astuple(self), astuple(other))))
+
+    def summary(self):
+        return (f"{self.rows_dropped:,} of {self.rows_in:,} rows dropped "
+                f"({self.too_long:,} too long, {self.duplicates:,} duplicate, {self.contained:,} overlapped), "
+                f"{self.clipped:,} clipped, {self.steps_removed:,} steps removed")
+
+
+def is_sorted_by_interval(begin, end):
+    """Checks in one pass whether rows are already ordered by (begin, end)."""
+    d_begin, d_end = np.diff(begin), np.diff(end)
+    return bool(np.all((d_begin > 0) | ((d_begin == 0) & (d_end >= 0))))
+
+
+def clean_intervals(df, covered_until=None):
+    """
+    Resolves duplicate and overlapping intervals in a frame with `_begin_time`,
+    `_end_time` and `_steps` columns. Returns the cleaned frame, sorted by
+    `_begin_time`, and a CleanReport.
+
+    When the frame is one batch of a larger table, `covered_until` is the
+    latest end time of all rows that begin before the batch, so intervals
+    reaching into it are resolved as if the whole table was cleaned at once.
+    """
+    report = CleanReport(rows_in=len(df))
+    if df.empty:
+        return df, report
+
+    begin = df["_begin_time"].to_numpy(np.int64)
+    end = np.maximum(df["_end_time"].fillna(df["_begin_time"]).to_numpy(np.int64), begin)
+    steps = df["_steps"].fillna(0).to_numpy(np.int64)
+
+    too_long = end - begin > MAX_INTERVAL_MS
+    if too_long.any():
+        report.too_long = int(too_long.sum())
+        report.steps_removed += int(steps[too_long].sum())
+        begin, end, steps = begin[~too_long], end[~too_long], steps[~too_long]
+        if not len(begin):
+            return df.iloc[:0][["_begin_time", "_end_time", "_steps"]], report
+
+    # The table is normally written in time order, so the sort is usually skipped.
+    if not is_sorted_by_interval(begin, end):
+        order = np.lexsort((end, begin))
+        begin, end, steps = begin[order], end[order], steps[order]
+
+    # Exact duplicates are adjacent after sorting; keep one row per group with its largest count.
+    first = np.ones(len(begin), dtype=bool)
+    first[1:] = (begin[1:] != begin[:-1]) | (end[1:] != end[:-1])
+    starts = np.flatnonzero(first)
+    report.duplicates = len(begin) - len(starts)
+    kept_steps = np.maximum.reduceat(steps, starts)
+    report.steps_removed += int(np.add.reduceat(steps, starts).sum() - kept_steps.sum())
+    begin, end, steps = begin[starts], end[starts], kept_steps
+
+    # Time covered by all earlier rows ends at the running maximum of their end times.
+    covered = np.empty_like(end)
+    covered[0] = np.iinfo(np.int64).min
+    np.maximum.accumulate(end[:-1], out=covered[1:])
+    if covered_until is not None:
+        np.maximum(covered, covered_until, out=covered)
+
+    contained = begin < covered
+    contained &= end <= covered
+    clipped = (begin < covered) & ~contained
+    report.contained = int(contained.sum())
+    report.clipped = int(clipped.sum())
+
+    new_begin = np.where(clipped, covered, begin)
+    scale = np.ones(len(begin))
+    scale[clipped] = (end[clipped] - covered[clipped]) / (end[clipped] - begin[clipped])
+    new_steps = np.rint(steps * scale).astype(np.int64)
+    new_steps[contained] = 0
+    report.steps_removed += int(steps.sum() - new_steps.sum())
+
+    keep = ~contained
+    cleaned = pd.DataFrame({
+        "_begin_time": new_begin[keep],
+        "_end_time": end[keep],
+        "_steps": new_steps[keep],
+    })
+    return cleaned, report
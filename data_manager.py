@@ -1,57 +1,354 @@
+import copy
 import sqlite3
+import hashlib
+import numpy as np
 import pandas as pd
 from PyQt6.QtCore import QObject, pyqtSignal
 from logger import log
-from datetime import datetime
+from datetime import datetime, date, timedelta
+from cleaning import CleanReport, clean_intervals, MAX_INTERVAL_MS
+from step_stats import StepStats
+from aggregate_store import open_current_store, publish_store, source_state
+
+# Only the columns the aggregations and interval cleaning use are read from StepsTable.
+STEP_COLUMNS = ["_begin_time", "_end_time", "_steps"]
+BEGIN_TIME_INDEX = "idx_steps_begin_time"
+MINUTES_PER_DAY = 24 * 60
+DAY_RESOLUTIONS = (60, 30, 15, 5)
+# Every day is kept as bins of the finest resolution; coarser views sum them.
+BASE_BIN_MINUTES = min(DAY_RESOLUTIONS)
+BINS_PER_DAY = MINUTES_PER_DAY // BASE_BIN_MINUTES
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def spread_over_bins(begin, end, steps, n_bins):
+    """
+    Splits each interval's steps over fixed-width bins in proportion to how
+    much of the interval falls into each bin. `begin` and `end` are measured
+    in bins from the start of bin 0 and may reach outside [0, n_bins); only
+    the part inside is counted. Returns `n_bins` floats.
+    """
+    length = end - begin
+    point = length == 0
+    rate = np.divide(steps, length, out=np.zeros(len(steps)), where=~point)
+    b = np.clip(begin, 0, n_bins)
+    e = np.clip(end, 0, n_bins)
+    b_bin, e_bin = np.floor(b).astype(np.int64), np.floor(e).astype(np.int64)
+    size = n_bins + 2
+
+    # Intervals that start and end inside the same bin go to that bin whole.
+    same = ~point & (b_bin == e_bin)
+    profile = np.zeros(size)
+    profile += np.bincount(b_bin[same], (rate * (e - b))[same], size)
+    # Longer intervals: partial first and last bins, and a constant rate in between.
+    span = ~point & ~same
+    profile += np.bincount(b_bin[span], (rate * (b_bin + 1 - b))[span], size)
+    profile += np.bincount(e_bin[span], (rate * (e - e_bin))[span], size)
+    rate_steps = np.bincount(b_bin[span] + 1, rate[span], size) - np.bincount(e_bin[span], rate[span], size)
+    profile += np.cumsum(rate_steps)
+    # Zero-length records count at their start, if that falls inside the range.
+    inside = point & (begin >= 0) & (begin < n_bins)
+    profile += np.bincount(b_bin[inside], steps[inside], size)
+    return profile[:n_bins]
 
 
 class DataManager:
-    """Handles loading and processing of step data to avoid re-computation."""
+    """
+    Handles loading and processing of step data to avoid re-computation.
 
-    def __init__(self, db_path):
+    In lazy mode only the most recent year is read up front; older years are
+    read on demand with `ensure_year` through an index on `_begin_time`.
+
+    With `use_store`, a current aggregate store next to the database is opened
+    instead of parsing it, and a new store is published once every year is
+    loaded.
+    """
+
+    def __init__(self, db_path, lazy=False, use_store=True):
         self.db_path = db_path
-        self.df = pd.DataFrame()
-        self.daily = pd.Series(dtype=int)
-        self.hourly = pd.Series(dtype=int)
-        self.monthly = pd.Series(dtype=int)
-        self.yearly = pd.Series(dtype=int)
+        self.lazy = lazy
+        self.use_store = use_store
+        self.store = None
+        self.source = None
+        self.tz = datetime.now().astimezone().tzinfo
         self.available_dates = []
+        # Years that have days with steps, plus years lazy mode has not read yet.
+        self.years = []
+        # Years in which rows with steps begin; these are what lazy mode reads.
+        self.row_years = []
+        self.loaded_years = set()
+        self.clean_report = CleanReport()
+        self.minute_begin = np.zeros(0)
+        self.minute_end = np.zeros(0)
+        self.interval_steps = np.zeros(0)
+        self.max_span_ms = 0
+        self.data_version = ""
+        self.stats = StepStats()
+        self.first_day = None
+        self.daily_array = np.zeros(0, dtype=np.int64)
+        self.bins = np.zeros((0, BINS_PER_DAY))
 
     def load_and_process(self):
         """Loads data from the DB and performs all aggregations once."""
         if not self.db_path:
             return
         try:
-            log.info(f"Connecting to database: {self.db_path}")
-            conn = sqlite3.connect(self.db_path)
-            df = pd.read_sql_query("SELECT _begin_time, _steps FROM StepsTable", conn)
-            conn.close()
-
-            if df.empty:
-                log.warning("Database table is empty.")
+            if self.use_store and self.open_store():
                 return
-
-            # Process data
-            df["ts"] = pd.to_datetime(
-                df["_begin_time"], unit="ms", utc=True
-            ).dt.tz_convert(datetime.now().astimezone().tzinfo)
-            df["date"] = df["ts"].dt.date
-            df["hour"] = df["ts"].dt.hour
-            df["month"] = df["ts"].dt.strftime('%Y-%m')
-            df["year"] = df["ts"].dt.year
-
-            # Aggregate data
-            self.df = df
-            self.hourly = self.df.groupby(["date", "hour"])["_steps"].sum()
-            self.daily = self.df.groupby("date")["_steps"].sum()
-            self.monthly = self.df.groupby("month")["_steps"].sum()
-            self.yearly = self.df.groupby("year")["_steps"].sum()
-            self.available_dates = sorted(self.daily.index)
+            log.info(f"Connecting to database: {self.db_path}")
+            if self.lazy:
+                self.ensure_index()
+                # Taken after indexing, which may itself write to the file.
+                self.source = source_state(self.db_path)
+                self.row_years = self.query_years()
+                if not self.row_years:
+                    log.warning("Database table is empty.")
+                    return
+                # The newest year may hold nothing but zero-step rows, so go back until a day has steps.
+                for year in reversed(self.row_years):
+                    self.ensure_year(year)
+                    if self.available_dates:
+                        break
+            else:
+                self.source = source_state(self.db_path)
+                df = self.read_rows()
+                if df.empty:
+                    log.warning("Database table is empty.")
+                    return
+                self.process_rows(df)
+                self.row_years = list(self.years)
+                self.loaded_years = set(self.years)
+                self.publish()
             log.info("Data processing complete.")
         except Exception as e:
             log.error(f"Error processing database: {e}")
             self.__init__(None)  # Reset data on failure
 
+    def open_store(self):
+        """Takes every aggregate from the published store if it matches the database. Returns True if it did."""
+        store = open_current_store(self.db_path, int(self.tz.utcoffset(None).total_seconds()))
+        if store is None:
+            return False
+        if store.bin_minutes != BASE_BIN_MINUTES or not len(store.daily):
+            store.close()
+            return False
+        self.store = store
+        self.source = store.source
+        self.first_day = store.base_day
+        self.daily_array = store.daily
+        self.bins = store.bins
+        self.data_version = store.data_version
+        self.available_dates = [self.first_day + timedelta(days=int(i)) for i in np.flatnonzero(self.daily_array)]
+        self.years = sorted({day.year for day in self.available_dates})
+        self.row_years = list(self.years)
+        self.loaded_years = set(self.years)
+        self.stats.update(self.first_day, self.daily_array)
+        log.info(f"Opened aggregate store {store.path} (data version {self.data_version})")
+        return True
+
+    def publish(self):
+        """Publishes the aggregates for other processes and later runs. Failures are only logged."""
+        if not self.use_store or self.store is not None or not self.available_dates:
+            return
+        try:
+            publish_store(self)
+        except OSError as e:
+            log.warning(f"Could not publish the aggregate store: {e}")
+
+    def year_bounds(self, year):
+        """Returns the [start, end) range of `_begin_time` values for a local calendar year."""
+        start = datetime(year, 1, 1, tzinfo=self.tz)
+        end = datetime(year + 1, 1, 1, tzinfo=self.tz)
+        return int(start.timestamp() * 1000), int(end.timestamp() * 1000)
+
+    def read_rows(self, time_range=None):
+        """Reads the step columns, optionally limited to a [start, end) `_begin_time` range."""
+        query = f"SELECT {', '.join(STEP_COLUMNS)} FROM StepsTable"
+        params = ()
+        if time_range is not None:
+            query += " WHERE _begin_time >= ? AND _begin_time < ?"
+            params = time_range
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return pd.read_sql_query(query, conn, params=params)
+        finally:
+            conn.close()
+
+    def ensure_index(self):
+        """Creates the `_begin_time` index on the local copy so year queries are range seeks."""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {BEGIN_TIME_INDEX} ON StepsTable(_begin_time)")
+            conn.commit()
+        except sqlite3.OperationalError as e:
+            log.warning(f"Could not index _begin_time, year queries will scan the table: {e}")
+        finally:
+            conn.close()
+
+    def query_years(self):
+        """Lists the years in which at least one row with steps begins, using index seeks only."""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            lo, hi = conn.execute("SELECT MIN(_begin_time), MAX(_begin_time) FROM StepsTable").fetchone()
+            if lo is None:
+                return []
+            # The longest interval bounds how far rows of one year can reach into the next.
+            span = conn.execute("SELECT MAX(COALESCE(_end_time, _begin_time) - _begin_time) FROM StepsTable").fetchone()[0]
+            # Cleaning drops longer rows, so they never reach into another year.
+            self.max_span_ms = min(max(int(span or 0), 0), MAX_INTERVAL_MS)
+            first = datetime.fromtimestamp(lo / 1000, self.tz).year
+            last = datetime.fromtimestamp(hi / 1000, self.tz).year
+            probe = "SELECT 1 FROM StepsTable WHERE _begin_time >= ? AND _begin_time < ? AND _steps > 0 LIMIT 1"
+            return [year for year in range(first, last + 1)
+                    if conn.execute(probe, self.year_bounds(year)).fetchone()]
+        finally:
+            conn.close()
+
+    def ensure_year(self, year):
+        """Loads one year of rows if it exists and has not been loaded yet. Returns True if it loaded."""
+        return self.load_years([year])
+
+    def load_years(self, years):
+        """
+        Loads those of `years` that have rows and are not loaded yet, then
+        rebuilds the aggregates once for all of them. Returns True if any loaded.
+        """
+        years = [year for year in sorted(set(years)) if year in self.row_years and year not in self.loaded_years]
+        if not self.db_path or not years:
+            return False
+        for year in years:
+            log.info(f"Loading steps for {year}...")
+            time_range = self.year_bounds(year)
+            df = self.read_rows(time_range)
+            self.loaded_years.add(year)
+            if not df.empty:
+                self.merge_rows(df, self.covered_until(time_range[0]))
+        self.rebuild()
+        if self.fully_loaded:
+            self.publish()
+        return True
+
+    def with_years(self, years):
+        """
+        Returns a copy with `years` loaded as well. This manager is left as it
+        is, so the views can keep reading it while the copy is built on a
+        worker thread; the arrays themselves are replaced, never modified.
+        """
+        loaded = copy.copy(self)
+        loaded.loaded_years = set(self.loaded_years)
+        loaded.stats = copy.deepcopy(self.stats)
+        loaded.load_years(years)
+        return loaded
+
+    def covered_until(self, start):
+        """
+        Latest end time of the rows that begin before `start`, so a year loaded
+        on its own is cleaned exactly as it would be in a full load. Only rows
+        within the longest interval of `start` can reach past it.
+        """
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return conn.execute(
+                "SELECT MAX(MAX(COALESCE(_end_time, _begin_time), _begin_time)) FROM StepsTable "
+                "WHERE _begin_time >= ? AND _begin_time < ? AND COALESCE(_end_time, _begin_time) - _begin_time <= ?",
+                (start - self.max_span_ms, start, MAX_INTERVAL_MS),
+            ).fetchone()[0]
+        finally:
+            conn.close()
+
+    def load_all_years(self):
+        """Loads every year that lazy mode has not read yet. Returns True if any year loaded."""
+        return self.load_years(self.row_years)
+
+    @property
+    def fully_loaded(self):
+        return self.loaded_years.issuperset(self.row_years)
+
+    def process_rows(self, df, covered_until=None):
+        """Cleans new rows, merges them into the interval arrays and rebuilds the bins from them."""
+        self.merge_rows(df, covered_until)
+        self.rebuild()
+
+    def merge_rows(self, df, covered_until=None):
+        """Cleans new rows and merges them into the interval arrays."""
+        df, report = clean_intervals(df, covered_until)
+        self.clean_report += report
+        if report.rows_dropped or report.clipped:
+            log.info(f"Interval cleaning: {report.summary()}")
+        # Rows without steps add nothing to the bins. Leaving them out keeps the interval
+        # arrays, and so the data version, the same whether or not lazy mode reads years without steps.
+        self.add_minute_intervals(df[df["_steps"] > 0])
+
+    def rebuild(self):
+        """Rebuilds the bins, statistics, data version and year list from the interval arrays."""
+        self.build_bins()
+        self.stats.update(self.first_day, self.daily_array)
+        self.update_data_version()
+        self.years = sorted({day.year for day in self.available_dates} | (set(self.row_years) - self.loaded_years))
+
+    def build_bins(self):
+        """
+        Spreads every interval over BASE_BIN_MINUTES bins from the first to the
+        last day it touches. This is the one definition of "steps in a period":
+        day bins, day totals and everything built on them are sums of these bins,
+        so a step counts on the day, and in the hour, in which it was taken.
+        """
+        if not len(self.minute_begin):
+            return
+        first = int(self.minute_begin[0] // MINUTES_PER_DAY)
+        # An interval ending exactly at midnight does not touch the next day.
+        last_minute = max(self.minute_begin[-1], (self.minute_end - 1e-6).max())
+        n_days = int(last_minute // MINUTES_PER_DAY) - first + 1
+        origin = first * MINUTES_PER_DAY
+        bins = spread_over_bins((self.minute_begin - origin) / BASE_BIN_MINUTES,
+                                (self.minute_end - origin) / BASE_BIN_MINUTES,
+                                self.interval_steps, n_days * BINS_PER_DAY)
+        self.bins = bins.reshape(n_days, BINS_PER_DAY)
+        self.daily_array = np.rint(self.bins.sum(axis=1)).astype(np.int64)
+        self.first_day = date.fromordinal(EPOCH_ORDINAL + first)
+        self.available_dates = [self.first_day + timedelta(days=int(i)) for i in np.flatnonzero(self.daily_array)]
+
+    def add_minute_intervals(self, df):
+        """Keeps the intervals as sorted arrays of local minutes since the epoch."""
+        offset_ms = self.tz.utcoffset(None).total_seconds() * 1000
+        begin = (df["_begin_time"].to_numpy(np.float64) + offset_ms) / 60000
+        end = (df["_end_time"].to_numpy(np.float64) + offset_ms) / 60000
+        steps = df["_steps"].to_numpy(np.float64)
+        if len(self.minute_begin):
+            begin = np.concatenate([self.minute_begin, begin])
+            end = np.concatenate([self.minute_end, end])
+            steps = np.concatenate([self.interval_steps, steps])
+            # Sorting on both ends keeps the arrays, and so the data version, independent of load order.
+            order = np.lexsort((end, begin))
+            begin, end, steps = begin[order], end[order], steps[order]
+        self.minute_begin, self.minute_end, self.interval_steps = begin, end, steps
+
+    def day_bins(self, day, bin_minutes=60):
+        """Returns the day's steps in bins of `bin_minutes`, split in proportion to interval overlap."""
+        i = (day - self.first_day).days if self.first_day else -1
+        if not 0 <= i < len(self.bins):
+            return np.zeros(MINUTES_PER_DAY // bin_minutes)
+        return self.bins[i].reshape(-1, bin_minutes // BASE_BIN_MINUTES).sum(axis=1)
+
+    def update_data_version(self):
+        """Fingerprints the processed data so caches and ETags change exactly when it does."""
+        digest = hashlib.blake2b(digest_size=8)
+        for array in (self.daily_array, self.minute_begin, self.minute_end, self.interval_steps):
+            digest.update(np.ascontiguousarray(array).tobytes())
+        digest.update(str(self.first_day).encode())
+        self.data_version = digest.hexdigest()
+
+    def daily_values(self, start, end):
+        """Returns steps for every day from `start` to `end` inclusive, zero-filled outside the data."""
+        values = np.zeros((end - start).days + 1, dtype=np.int64)
+        if self.first_day is None:
+            return values
+        lo = (start - self.first_day).days
+        src_lo, src_hi = max(lo, 0), min(lo + len(values), len(self.daily_array))
+        if src_lo < src_hi:
+            values[src_lo - lo:src_hi - lo] = self.daily_array[src_lo:src_hi]
+        return values
+
 
 class DataWorker(QObject):
     """Worker thread for loading data asynchronously."""
@@ -59,14 +356,33 @@ class DataWorker(QObject):
     finished = pyqtSignal(DataManager)
     error = pyqtSignal(str)
 
-    def __init__(self, db_path):
+    def __init__(self, db_path, lazy=False):
         super().__init__()
         self.db_path = db_path
+        self.lazy = lazy
 
     def run(self):
         try:
-            data_manager = DataManager(self.db_path)
+            data_manager = DataManager(self.db_path, lazy=self.lazy)
             data_manager.load_and_process()
             self.finished.emit(data_manager)
         except Exception as e:
             self.error.emit(str(e))
+
+
+class YearLoadWorker(QObject):
+    """Worker thread for loading more years of a lazily loaded DataManager."""
+
+    finished = pyqtSignal(DataManager)
+    error = pyqtSignal(str)
+
+    def __init__(self, data_manager, years):
+        super().__init__()
+        self.data_manager = data_manager
+        self.years = years
+
+    def run(self):
+        try:
+            self.finished.emit(self.data_manager.with_years(self.years))
+        except Exception as e:
+            self.error.emit(str(e))
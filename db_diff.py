@@ -0,0 +1,254 @@
+"""
+Row-level diff between two Steps.db snapshots.
+
+Usage: python db_diff.py OLD.db NEW.db [--days N]
+
+SQLite reduces both tables to per-day fingerprints first (row count, step
+sum, begin and end sums and an order-independent sum of row hashes), so the
+rows of days that did not change are never read. Rows of the remaining days
+are matched on exact (`_begin_time`, `_end_time`) pairs first; rows left over
+are then paired by `_begin_time` alone, so a row whose end or step count
+was edited shows up as changed rather than as a removal plus an addition.
+
+Step totals in the report are raw sums of `_steps` over the rows that begin
+on each day, taken before cleaning. They can differ from the viewer's daily
+totals, which drop duplicates and overlaps and split rows across midnight.
+"""
+import sys
+import sqlite3
+import argparse
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, date, timedelta
+
+import numpy as np
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from logger import log
+
+MS_PER_DAY = 86_400_000
+EPOCH = date(1970, 1, 1)
+ROW_DTYPE = np.dtype([("begin", np.int64), ("end", np.int64), ("steps", np.int64), ("day", np.int64)])
+# Columns of Snapshot.fingerprints; the first two are the row count and the raw step sum.
+FINGERPRINT_FIELDS = ("count", "steps", "begin_sum", "end_sum", "hash_sum")
+FINGERPRINT_DTYPE = np.dtype([("day", np.int64)] + [(name, np.int64) for name in FINGERPRINT_FIELDS])
+# Keeps every per-row hash term below 2**62, so SQLite's integer SUM cannot overflow.
+HASH_MOD = 2_147_483_647
+# Rows with their local day, floored like NumPy's // so rows before 1970 keep their day.
+ROWS_SQL = """
+    SELECT _begin_time AS b, COALESCE(_end_time, _begin_time) AS e, COALESCE(_steps, 0) AS s,
+           (_begin_time + :offset - ((_begin_time + :offset) % :day + :day) % :day) / :day AS day
+    FROM StepsTable WHERE _begin_time IS NOT NULL"""
+
+
+@dataclass
+class DayDiff:
+    """Row changes on one local day. The step counts are raw row sums by begin day, before cleaning."""
+    day: date
+    old_steps: int
+    new_steps: int
+    added: int
+    removed: int
+    changed: int
+
+    @property
+    def delta(self):
+        return self.new_steps - self.old_steps
+
+
+@dataclass
+class DiffReport:
+    old_rows: int = 0
+    new_rows: int = 0
+    added: int = 0
+    removed: int = 0
+    changed: int = 0
+    days: list = field(default_factory=list)
+
+    def summary(self, max_days=None):
+        lines = [
+            f"Rows: {self.old_rows:,} -> {self.new_rows:,}  |  "
+            f"Added: {self.added:,}  Removed: {self.removed:,}  Changed: {self.changed:,}",
+            f"Affected days: {len(self.days):,}",
+        ]
+        if self.days:
+            lines.append("Steps per day are raw row sums by begin day, before cleaning:")
+        shown = self.days if max_days is None else self.days[:max_days]
+        for d in shown:
+            lines.append(f"  {d.day}  {d.old_steps:>8,} -> {d.new_steps:>8,}  ({d.delta:+,})  "
+                         f"+{d.added} -{d.removed} ~{d.changed}")
+        if len(shown) < len(self.days):
+            lines.append(f"  ... {len(self.days) - len(shown):,} more day(s)")
+        return "\n".join(lines)
+
+
+class Snapshot:
+    """
+    Per-day fingerprints of one database, computed by SQLite. Rows are only
+    read into Python for the days passed to rows().
+    """
+
+    def __init__(self, db_path, tz):
+        self.db_path = db_path
+        self.params = {"offset": int(tz.utcoffset(None).total_seconds() * 1000), "day": MS_PER_DAY}
+        conn = sqlite3.connect(db_path)
+        try:
+            cursor = conn.execute(f"""
+                SELECT day, COUNT(*), SUM(s), SUM(b), SUM(e),
+                       SUM((b * 31 + e) % {HASH_MOD} * (s % {HASH_MOD} + 1) % {HASH_MOD})
+                FROM ({ROWS_SQL}) GROUP BY day ORDER BY day""", self.params)
+            fingerprints = np.fromiter(cursor, dtype=FINGERPRINT_DTYPE)
+        finally:
+            conn.close()
+        self.days = fingerprints["day"]
+        self.fingerprints = np.column_stack([fingerprints[name] for name in FINGERPRINT_FIELDS])
+
+    def rows(self, days):
+        """Returns (begin, end, steps, day) arrays of the rows that begin on one of the sorted `days`."""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.execute("CREATE TEMP TABLE wanted_days (day INTEGER PRIMARY KEY)")
+            conn.executemany("INSERT INTO wanted_days VALUES (?)", ((int(day),) for day in days))
+            # The begin range is a cheap pre-filter for the common case of a few recent days.
+            bounds = {"first": int(days[0]) * MS_PER_DAY - self.params["offset"],
+                      "stop": (int(days[-1]) + 1) * MS_PER_DAY - self.params["offset"]}
+            cursor = conn.execute(f"SELECT b, e, s, day FROM ({ROWS_SQL}) WHERE b >= :first AND b < :stop "
+                                  "AND day IN (SELECT day FROM wanted_days)", self.params | bounds)
+            rows = np.fromiter(cursor, dtype=ROW_DTYPE)
+        finally:
+            conn.close()
+        return rows["begin"], rows["end"], rows["steps"], rows["day"]
+
+
+def align_days(all_days, days, *arrays):
+    """Spreads per-day arrays over `all_days`, zero-filling days that are missing."""
+    index = np.searchsorted(all_days, days)
+    aligned = []
+    for array in arrays:
+        full = np.zeros((len(all_days),) + array.shape[1:], dtype=array.dtype)
+        full[index] = array
+        aligned.append(full)
+    return aligned
+
+
+def match_rows(old_cols, new_cols):
+    """
+    Pairs rows that are equal in every column, one-to-one: the k-th copy of a
+    value in `old_cols` pairs with its k-th copy in `new_cols`. Returns the
+    indices of the paired old and new rows.
+    """
+    n_old = len(old_cols[0])
+    cols = [np.concatenate([o, n]) for o, n in zip(old_cols, new_cols)]
+    side = np.repeat([0, 1], [n_old, len(new_cols[0])])
+    # Equal values end up adjacent, old copies before new ones.
+    order = np.lexsort((side, *cols[::-1]))
+    if not len(order):
+        return order, order
+    cols = [c[order] for c in cols]
+    boundary = np.zeros(len(order), dtype=bool)
+    boundary[0] = True
+    for c in cols:
+        boundary[1:] |= c[1:] != c[:-1]
+    group = np.cumsum(boundary) - 1
+    group_start = np.flatnonzero(boundary)
+    is_old = side[order] == 0
+    n_old_in_group = np.bincount(group[is_old], minlength=len(group_start))
+    n_new_in_group = np.bincount(group[~is_old], minlength=len(group_start))
+
+    # The old copy at position p of its group pairs with the new copy at
+    # group start + old count + p, if the group has that many new copies.
+    pos = np.arange(len(order)) - group_start[group]
+    paired = is_old & (pos < n_new_in_group[group])
+    partner = group_start[group] + n_old_in_group[group] + pos
+    return order[paired], order[partner[paired]] - n_old
+
+
+def diff_snapshots(old, new):
+    """Compares two Snapshots and returns a DiffReport."""
+    report = DiffReport(old_rows=int(old.fingerprints[:, 0].sum()), new_rows=int(new.fingerprints[:, 0].sum()))
+
+    # Align the per-day fingerprints on the union of days.
+    all_days = np.union1d(old.days, new.days)
+    (o_prints,) = align_days(all_days, old.days, old.fingerprints)
+    (n_prints,) = align_days(all_days, new.days, new.fingerprints)
+    dirty = (o_prints != n_prints).any(axis=1)
+    dirty_days = all_days[dirty]
+    if not len(dirty_days):
+        return report
+
+    # Only the rows of changed days are read and matched: exact intervals
+    # first, then whatever is left over by begin time alone.
+    o_begin, o_end, o_steps, o_day = old.rows(dirty_days)
+    n_begin, n_end, n_steps, n_day = new.rows(dirty_days)
+    exact_old, exact_new = match_rows((o_begin, o_end), (n_begin, n_end))
+    o_left = np.delete(np.arange(len(o_begin)), exact_old)
+    n_left = np.delete(np.arange(len(n_begin)), exact_new)
+    begin_old, begin_new = match_rows((o_begin[o_left],), (n_begin[n_left],))
+
+    matched_old = np.concatenate([exact_old, o_left[begin_old]])
+    matched_new = np.concatenate([exact_new, n_left[begin_new]])
+    changed = (o_end[matched_old] != n_end[matched_new]) | (o_steps[matched_old] != n_steps[matched_new])
+    removed_rows = np.delete(o_left, begin_old)
+    added_rows = np.delete(n_left, begin_new)
+
+    report.added, report.removed, report.changed = len(added_rows), len(removed_rows), int(changed.sum())
+
+    def per_day(day_values):
+        return np.bincount(np.searchsorted(dirty_days, day_values), minlength=len(dirty_days))
+
+    added_per_day = per_day(n_day[added_rows])
+    removed_per_day = per_day(o_day[removed_rows])
+    changed_per_day = per_day(o_day[matched_old[changed]])
+    old_sums, new_sums = o_prints[dirty, 1], n_prints[dirty, 1]
+    for i, day in enumerate(dirty_days):
+        report.days.append(DayDiff(
+            EPOCH + timedelta(days=int(day)), int(old_sums[i]), int(new_sums[i]),
+            int(added_per_day[i]), int(removed_per_day[i]), int(changed_per_day[i]),
+        ))
+    return report
+
+
+def diff_databases(old_path, new_path, tz=None):
+    """Loads both databases and diffs them. Days are local to `tz` (default: the system zone)."""
+    tz = tz or datetime.now().astimezone().tzinfo
+    log.info(f"Comparing {old_path} with {new_path}")
+    # SQLite releases the GIL while it aggregates, so both databases are fingerprinted at once.
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        old, new = pool.map(Snapshot, (old_path, new_path), (tz, tz))
+    report = diff_snapshots(old, new)
+    log.info(f"Diff complete: {report.added:,} added, {report.removed:,} removed, "
+             f"{report.changed:,} changed across {len(report.days):,} day(s)")
+    return report
+
+
+class DiffWorker(QObject):
+    """Worker thread for diffing two databases without blocking the GUI."""
+
+    finished = pyqtSignal(object)
+    error = pyqtSignal(str)
+
+    def __init__(self, old_path, new_path):
+        super().__init__()
+        self.old_path = old_path
+        self.new_path = new_path
+
+    def run(self):
+        try:
+            self.finished.emit(diff_databases(self.old_path, self.new_path))
+        except Exception as e:
+            log.error(f"Database diff failed: {e}")
+            self.error.emit(str(e))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show rows and days that differ between two Steps.db files.")
+    parser.add_argument("old_db")
+    parser.add_argument("new_db")
+    parser.add_argument("--days", type=int, default=50, help="maximum number of days to list (default: 50)")
+    args = parser.parse_args(argv)
+    print(diff_databases(args.old_db, args.new_db).summary(args.days))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
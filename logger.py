@@ -1,22 +1,89 @@
 # logger.py
+import os
 import sys
+import queue
+import atexit
 import logging
+import logging.handlers
 
-def setup_logger():
-    """Sets up a logger that prints to the console."""
-    log = logging.getLogger("MIUI_Steps_Explorer")
-    log.setLevel(logging.INFO)
+LOG_NAME = "MIUI_Steps_Explorer"
+LOG_FILE_NAME = "miui_steps.log"
+LOG_MAX_BYTES = 1_000_000
+LOG_BACKUP_COUNT = 3
+# Set once the GUI enables its log file.
+log_file_path = None
+FORMATTER = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s", datefmt="%H:%M:%S")
+
+
+def user_log_dir():
+    """Per-user directory for the log file, independent of the working directory."""
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Logs")
+    else:
+        base = os.environ.get("XDG_STATE_HOME") or os.path.expanduser("~/.local/state")
+    return os.path.join(base, "miui-steps-explorer")
+
+
+def start_listener(log, *handlers):
+    """
+    Hands records to a background listener through a queue, so callers such
+    as the ADB worker never wait on console or disk I/O.
+    """
+    log_queue = queue.SimpleQueue()
+    log.addHandler(logging.handlers.QueueHandler(log_queue))
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+
+def setup_logger(level=None):
+    """
+    Sets up a logger that prints to the console. The level defaults to INFO
+    and can be overridden with the MIUI_STEPS_LOG_LEVEL environment variable;
+    an unknown level name falls back to INFO with a warning.
+    """
+    log = logging.getLogger(LOG_NAME)
+    log.setLevel(logging.DEBUG)
 
     # Avoid adding duplicate handlers if this function is called multiple times
     if not log.handlers:
-        handler = logging.StreamHandler(sys.stdout)
-        formatter = logging.Formatter(
-            "%(asctime)s - %(levelname)s - %(message)s",
-            datefmt="%H:%M:%S"
-        )
-        handler.setFormatter(formatter)
-        log.addHandler(handler)
+        level_name = (level or os.environ.get("MIUI_STEPS_LOG_LEVEL", "INFO")).upper()
+        console_level = logging.getLevelName(level_name)
+        console = logging.StreamHandler(sys.stdout)
+        console.setLevel(console_level if isinstance(console_level, int) else logging.INFO)
+        console.setFormatter(FORMATTER)
+        start_listener(log, console)
+        if not isinstance(console_level, int):
+            log.warning(f"Unknown log level {level_name!r}, using INFO")
 
     return log
 
+
+def enable_file_log(log_dir=None):
+    """
+    Adds a rotating DEBUG log file in the per-user log directory. Only the GUI
+    calls this: rotation is not safe across processes, so CLI tools and
+    worker processes log to the console only.
+    """
+    global log_file_path
+    log = logging.getLogger(LOG_NAME)
+    if log_file_path:
+        return log_file_path
+    log_file = os.path.join(log_dir or user_log_dir(), LOG_FILE_NAME)
+    try:
+        os.makedirs(os.path.dirname(log_file), exist_ok=True)
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
+        )
+    except OSError as e:
+        log.warning(f"Log file disabled: {e}")
+        return None
+    file_handler.setLevel(logging.DEBUG)
+    file_handler.setFormatter(FORMATTER)
+    start_listener(log, file_handler)
+    log_file_path = log_file
+    return log_file
+
 log = setup_logger()
@@ -1,8 +1,10 @@
 import sys
 from PyQt6.QtWidgets import QApplication
 from ui.main_window import StepViewer
+from logger import enable_file_log
 
 if __name__ == "__main__":
+    enable_file_log()
     app = QApplication(sys.argv)
     dark_stylesheet = """
         QWidget { background-color: #212121; color: #FAFAFA; font-size: 11pt; }
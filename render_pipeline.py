@@ -0,0 +1,116 @@
+"""
+Off-GUI-thread figure rendering.
+
+Controllers submit a RenderJob holding an immutable snapshot of the arrays a
+chart needs. A single worker thread builds the figure with the Agg backend
+and hands back only the finished pixels plus the axes geometry needed to map
+clicks to data coordinates. Every page has a generation counter; jobs and
+results that are older than the latest request for their page are dropped.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from PyQt6.QtCore import QObject, QThread, pyqtSignal
+from PyQt6.QtGui import QImage
+
+from charts import CHART_BUILDERS
+from logger import log
+
+
+@dataclass(frozen=True)
+class RenderJob:
+    page: int
+    generation: int
+    kind: str
+    args: tuple
+    width: int
+    height: int
+    dpi: float
+
+
+@dataclass(frozen=True)
+class RenderResult:
+    page: int
+    generation: int
+    image: QImage
+    axes_box: tuple  # x0, y0, x1, y1 in image pixels, origin at the top left
+    xlim: tuple
+    ylim: tuple
+
+
+def freeze(value):
+    """Copies arrays into read-only snapshots so later data changes cannot leak into a render."""
+    if isinstance(value, np.ndarray):
+        value = value.copy()
+        value.setflags(write=False)
+        return value
+    if isinstance(value, list):
+        return tuple(value)
+    return value
+
+
+class RenderWorker(QObject):
+    """Builds figures on the render thread."""
+
+    rendered = pyqtSignal(object)
+
+    def __init__(self, latest):
+        super().__init__()
+        self.latest = latest
+
+    def render(self, job):
+        if job.generation != self.latest.get(job.page):
+            return  # The selection already moved on before this job started.
+        try:
+            fig = Figure(figsize=(job.width / job.dpi, job.height / job.dpi), dpi=job.dpi)
+            canvas = FigureCanvasAgg(fig)
+            ax = CHART_BUILDERS[job.kind](fig, *job.args)
+            canvas.draw()
+            width, height = canvas.get_width_height()
+            image = QImage(bytes(canvas.buffer_rgba()), width, height, QImage.Format.Format_RGBA8888).copy()
+            box = ax.get_window_extent()
+            self.rendered.emit(RenderResult(
+                job.page, job.generation, image,
+                (box.x0, height - box.y1, box.x1, height - box.y0),
+                tuple(ax.get_xlim()), tuple(ax.get_ylim()),
+            ))
+        except Exception as e:
+            log.error(f"Rendering {job.kind} chart failed: {e}")
+
+
+class RenderPipeline(QObject):
+    """Owns the render thread and forwards only the newest result for each page."""
+
+    submitted = pyqtSignal(object)
+    finished = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.latest = {}
+        self.thread = QThread()
+        self.worker = RenderWorker(self.latest)
+        self.worker.moveToThread(self.thread)
+        self.submitted.connect(self.worker.render)
+        self.worker.rendered.connect(self.on_rendered)
+        self.thread.finished.connect(self.worker.deleteLater)
+        self.thread.start()
+
+    def submit(self, page, kind, args, width, height, dpi):
+        generation = self.latest.get(page, 0) + 1
+        self.latest[page] = generation
+        self.submitted.emit(RenderJob(page, generation, kind, tuple(freeze(a) for a in args),
+                                      max(int(width), 1), max(int(height), 1), dpi))
+
+    def invalidate(self, page):
+        """Drops any render still in flight for the page."""
+        self.latest[page] = self.latest.get(page, 0) + 1
+
+    def on_rendered(self, result):
+        if result.generation == self.latest.get(result.page):
+            self.finished.emit(result)
+
+    def stop(self):
+        self.thread.quit()
+        self.thread.wait()
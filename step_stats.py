@@ -0,0 +1,141 @@
+"""
+Precomputed step statistics: goal streaks, per-year percentiles, records
+and weekday profiles.
+
+Everything is derived from DataManager's dense per-day array with whole-array
+NumPy operations. Per-year results are cached under a fingerprint of that
+year's days, so when rows for another year arrive only the changed years
+are recomputed.
+"""
+import hashlib
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+import numpy as np
+
+DEFAULT_GOAL = 10000
+PERCENTILES = (25, 50, 75, 90)
+
+
+@dataclass
+class Streak:
+    length: int = 0
+    start: date | None = None
+
+    @property
+    def end(self):
+        return self.start + timedelta(days=self.length - 1) if self.length else None
+
+
+@dataclass
+class YearStats:
+    year: int
+    total: int = 0
+    active_days: int = 0
+    goal_days: int = 0
+    daily_mean: int = 0
+    percentiles: dict = field(default_factory=dict)
+    best_day: tuple = (None, 0)
+    best_week: tuple = (None, 0)
+    best_month: tuple = (None, 0)
+    monthly_totals: list = field(default_factory=lambda: [0] * 12)
+    monthly_means: list = field(default_factory=lambda: [0] * 12)
+    monthly_mean: int = 0
+    weekday_means: list = field(default_factory=lambda: [0] * 7)
+
+
+def goal_runs(values, goal):
+    """Returns (starts, lengths) of every run of consecutive days meeting the goal."""
+    met = np.concatenate(([False], values >= goal, [False]))
+    edges = np.flatnonzero(met[1:] != met[:-1])
+    starts, ends = edges[::2], edges[1::2]
+    return starts, ends - starts
+
+
+def compute_year_stats(year, first_day, last_day, values, goal=DEFAULT_GOAL):
+    """
+    Statistics for one calendar year. `values` holds one value per day of the
+    year starting on Jan 1; `first_day` and `last_day` bound the days with data.
+    """
+    jan1 = date(year, 1, 1)
+    stats = YearStats(year)
+    active = values[values > 0]
+    if not len(active):
+        return stats
+    stats.total = int(values.sum())
+    stats.active_days = len(active)
+    stats.goal_days = int((values >= goal).sum())
+    stats.daily_mean = int(active.mean())
+    stats.percentiles = dict(zip(PERCENTILES, np.percentile(active, PERCENTILES).astype(int).tolist()))
+
+    best = int(values.argmax())
+    stats.best_day = (jan1 + timedelta(days=best), int(values[best]))
+
+    # Monday-based weeks clipped to the year.
+    offset = jan1.weekday()
+    day_index = np.arange(len(values))
+    week_totals = np.bincount((day_index + offset) // 7, values)
+    best_week = int(week_totals.argmax())
+    stats.best_week = (max(jan1, jan1 + timedelta(days=best_week * 7 - offset)), int(week_totals[best_week]))
+
+    month_starts = np.array([(date(year, m, 1) - jan1).days for m in range(1, 13)])
+    month_index = np.searchsorted(month_starts, day_index, side="right") - 1
+    monthly = np.bincount(month_index, values, 12).astype(np.int64)
+    active_per_month = np.bincount(month_index, values > 0, 12)
+    stats.monthly_totals = monthly.tolist()
+    stats.monthly_means = np.divide(monthly, active_per_month, out=np.zeros(12), where=active_per_month > 0).astype(int).tolist()
+    stats.monthly_mean = int(monthly[monthly > 0].mean())
+    stats.best_month = (int(monthly.argmax()) + 1, int(monthly.max()))
+
+    # Weekday means only cover days inside the data, not the zero padding around it.
+    covered = (day_index >= (first_day - jan1).days) & (day_index <= (last_day - jan1).days)
+    weekdays = (day_index + offset) % 7
+    weekday_days = np.bincount(weekdays[covered], minlength=7)
+    weekday_totals = np.bincount(weekdays[covered], values[covered], 7)
+    stats.weekday_means = np.divide(weekday_totals, weekday_days, out=np.zeros(7), where=weekday_days > 0).astype(int).tolist()
+    return stats
+
+
+class StepStats:
+    """Cache of statistics that DataManager refreshes whenever it processes rows."""
+
+    def __init__(self, goal=DEFAULT_GOAL):
+        self.goal = goal
+        self.years = {}
+        self.fingerprints = {}
+        self.longest_streak = Streak()
+        self.current_streak = Streak()
+
+    def update(self, first_day, daily_array):
+        if first_day is None or not len(daily_array):
+            return
+        last_day = first_day + timedelta(days=len(daily_array) - 1)
+        daily_array = np.asarray(daily_array, dtype=np.int64)
+
+        starts, lengths = goal_runs(daily_array, self.goal)
+        if len(lengths):
+            longest = int(lengths.argmax())
+            self.longest_streak = Streak(int(lengths[longest]), first_day + timedelta(days=int(starts[longest])))
+        else:
+            self.longest_streak = Streak()
+        if len(lengths) and starts[-1] + lengths[-1] == len(daily_array):
+            self.current_streak = Streak(int(lengths[-1]), first_day + timedelta(days=int(starts[-1])))
+        else:
+            self.current_streak = Streak()
+
+        for year in range(first_day.year, last_day.year + 1):
+            jan1 = date(year, 1, 1)
+            values = np.zeros((date(year + 1, 1, 1) - jan1).days, dtype=np.int64)
+            lo = (jan1 - first_day).days
+            src_lo, src_hi = max(lo, 0), min(lo + len(values), len(daily_array))
+            values[src_lo - lo:src_hi - lo] = daily_array[src_lo:src_hi]
+            # The data bounds matter for the weekday means, so they are part of the fingerprint.
+            bounds = f"{max(first_day, jan1)}:{min(last_day, date(year, 12, 31))}".encode()
+            fingerprint = hashlib.blake2b(values.tobytes() + bounds, digest_size=8).digest()
+            if self.fingerprints.get(year) == fingerprint:
+                continue
+            self.fingerprints[year] = fingerprint
+            self.years[year] = compute_year_stats(year, first_day, last_day, values, self.goal)
+
+    def year(self, year):
+        return self.years.get(year, YearStats(year))
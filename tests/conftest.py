@@ -0,0 +1,43 @@
+import os
+import sys
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def ms(*args):
+    """Epoch milliseconds of a local datetime."""
+    return int(datetime(*args).astimezone().timestamp() * 1000)
+
+
+def write_steps_db(path, rows):
+    """Creates a StepsTable holding (begin_ms, end_ms, steps) rows, replacing any existing table."""
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("DROP TABLE IF EXISTS StepsTable")
+        conn.execute("CREATE TABLE StepsTable (_id INTEGER PRIMARY KEY, _begin_time INTEGER, "
+                     "_end_time INTEGER, _mode INTEGER, _steps INTEGER)")
+        conn.executemany("INSERT INTO StepsTable (_begin_time, _end_time, _mode, _steps) VALUES (?, ?, 1, ?)", rows)
+        conn.commit()
+    finally:
+        conn.close()
+    return str(path)
+
+
+@pytest.fixture
+def steps_db(tmp_path):
+    """Returns a function that writes rows to a fresh database under tmp_path."""
+    def make(rows, name="Steps.db"):
+        return write_steps_db(tmp_path / name, rows)
+    return make
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    """A QApplication on the offscreen platform, for tests of widgets and Qt threads."""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtWidgets import QApplication
+    return QApplication.instance() or QApplication([])
@@ -0,0 +1,62 @@
+import os
+
+import numpy as np
+
+from aggregate_store import AggregateStore, publish_store, store_path_for
+from data_manager import DataManager
+from conftest import ms
+
+
+ROWS = [(ms(2023, 12, 31, 23, 40), ms(2024, 1, 1, 0, 20), 800), (ms(2024, 2, 10, 9), ms(2024, 2, 10, 9, 45), 4500)]
+
+
+def loaded(path, **kwargs):
+    data_manager = DataManager(path, **kwargs)
+    data_manager.load_and_process()
+    return data_manager
+
+
+def test_published_store_is_used_while_the_database_is_unchanged(steps_db):
+    path = steps_db(ROWS)
+    parsed = loaded(path)
+    assert parsed.store is None and os.path.exists(store_path_for(path))
+
+    from_store = loaded(path, lazy=True)
+    assert from_store.store is not None
+    assert from_store.data_version == parsed.data_version
+    assert from_store.years == parsed.years and from_store.fully_loaded
+    assert np.shares_memory(from_store.daily_array, from_store.store.daily)
+    first, last = parsed.available_dates[0], parsed.available_dates[-1]
+    assert np.array_equal(from_store.daily_values(first, last), parsed.daily_values(first, last))
+    for day in parsed.available_dates:
+        assert np.array_equal(from_store.day_bins(day, 15), parsed.day_bins(day, 15))
+
+    steps_db(ROWS[:1])
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    reparsed = loaded(path)
+    assert reparsed.store is None and reparsed.data_version != parsed.data_version
+
+
+def test_lazy_load_publishes_once_every_year_is_loaded(steps_db):
+    path = steps_db(ROWS)
+    lazy = loaded(path, lazy=True)
+    assert not os.path.exists(store_path_for(path))
+    lazy.load_all_years()
+    assert AggregateStore(store_path_for(path)).data_version == loaded(path, use_store=False).data_version
+
+
+def test_reopen_keeps_views_of_the_old_store_valid(steps_db, tmp_path):
+    data_manager = loaded(steps_db(ROWS), use_store=False)
+    store_path = publish_store(data_manager, str(tmp_path / "shared.agg"))
+    store = AggregateStore(store_path)
+    daily_view, bins_view = store.daily, store.bins[1]
+
+    publish_store(data_manager, store_path)
+    new_store = store.reopen()
+    assert new_store is not store
+    assert daily_view.sum() == new_store.daily.sum()
+    assert np.array_equal(bins_view, new_store.bins[1])
+    store.close()  # a caller still holds `daily_view`
+    assert daily_view.sum() == data_manager.daily_array.sum()
+    new_store.close()
@@ -0,0 +1,82 @@
+import os
+import json
+import threading
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import pytest
+
+from api_server import MAX_CACHE_ENTRIES, make_server
+from data_manager import DataManager
+from conftest import ms
+
+
+ROWS = [(ms(2024, 5, 1, 8), ms(2024, 5, 1, 8, 30), 3000), (ms(2024, 5, 2, 18), ms(2024, 5, 2, 18, 10), 1200)]
+
+
+@pytest.fixture
+def server(steps_db):
+    path = steps_db(ROWS)
+    data_manager = DataManager(path)
+    data_manager.load_and_process()
+    server = make_server(data_manager, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def fetch(server, path, **headers):
+    try:
+        with urlopen(Request(server.base_url + path, headers=headers)) as response:
+            return response.status, response.headers, response.read()
+    except HTTPError as e:
+        return e.code, e.headers, e.read()
+
+
+def test_endpoints(server):
+    status, headers, body = fetch(server, "/day/2024-05-01?resolution=15")
+    day = json.loads(body)
+    assert status == 200 and headers["ETag"] == f'"{server.api.version}"'
+    assert day["total"] == 3000 and len(day["bins"]) == 96 and sum(day["bins"]) == 3000
+    assert json.loads(fetch(server, "/month/2024-05")[2])["total"] == 4200
+    assert json.loads(fetch(server, "/year/2024")[2])["months"][4] == 4200
+    assert json.loads(fetch(server, "/range?start=2024-05-02&end=2024-05-03")[2])["days"] == [1200, 0]
+    assert fetch(server, "/nope")[0] == 404
+    assert fetch(server, "/day/2024-05-01?resolution=7")[0] == 400
+
+
+def test_conditional_requests(server):
+    etag = fetch(server, "/version")[1]["ETag"]
+    assert fetch(server, "/version", **{"If-None-Match": etag})[0] == 304
+    assert fetch(server, "/version", **{"If-None-Match": f'"other", W/{etag}'})[0] == 304
+    assert fetch(server, "/version", **{"If-None-Match": "*"})[0] == 304
+    assert fetch(server, "/version", **{"If-None-Match": '"other"'})[0] == 200
+    assert fetch(server, "/nope", **{"If-None-Match": "*"})[0] == 404
+
+
+def test_cache_is_keyed_by_route_and_bounded(server):
+    for i in range(20):
+        fetch(server, f"/version?x={i}")
+    assert len(server.api.cache) == 1
+    for i in range(MAX_CACHE_ENTRIES + 20):
+        server.api.get(f"/range?start=2020-01-01&end=2020-{1 + i // 28:02d}-{1 + i % 28:02d}")
+    assert len(server.api.cache) == MAX_CACHE_ENTRIES
+
+
+def test_reloads_when_the_database_changes(server, steps_db):
+    old_etag = fetch(server, "/version")[1]["ETag"]
+    path = steps_db(ROWS + [(ms(2024, 5, 3, 7), ms(2024, 5, 3, 7, 5), 500)])
+    assert path == server.api.data_manager.db_path
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    # The request that notices the change is still answered from the previous version.
+    status, headers, body = fetch(server, "/month/2024-05")
+    assert headers["ETag"] == old_etag and json.loads(body)["total"] == 4200
+    server.api.reload_thread.join(10)
+    status, headers, body = fetch(server, "/month/2024-05")
+    assert headers["ETag"] != old_etag
+    assert json.loads(body)["total"] == 4700
+    assert fetch(server, "/version", **{"If-None-Match": old_etag})[0] == 200
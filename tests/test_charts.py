@@ -0,0 +1,28 @@
+import warnings
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+from matplotlib.figure import Figure
+
+from charts import calendar_cell_date, calendar_grid, draw_calendar
+
+
+@pytest.mark.parametrize("year", [2021, 2024])  # starts on a Friday; leap year
+def test_calendar_cells_round_trip(year):
+    n_days = (date(year + 1, 1, 1) - date(year, 1, 1)).days
+    grid = calendar_grid(year, np.arange(1, n_days + 1))
+    assert grid.count() == n_days
+    for y, x in zip(*np.nonzero(~np.ma.getmaskarray(grid))):
+        day = calendar_cell_date(year, x, y)
+        assert day == date(year, 1, 1) + timedelta(days=int(grid[y, x]) - 1)
+        assert day.weekday() == y
+    for y, x in zip(*np.nonzero(np.ma.getmaskarray(grid))):
+        assert calendar_cell_date(year, x, y) is None
+    assert calendar_cell_date(2024, 8, 6.4) == date(2024, 3, 3)  # clicks round to the nearest cell
+
+
+def test_draw_calendar_emits_no_warnings():
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        draw_calendar(Figure(), 2024, np.zeros(366))
@@ -0,0 +1,38 @@
+import pandas as pd
+
+from cleaning import CleanReport, clean_intervals, MAX_INTERVAL_MS
+
+
+def frame(rows):
+    return pd.DataFrame(rows, columns=["_begin_time", "_end_time", "_steps"])
+
+
+def test_report_counts_each_kind_of_row():
+    rows = [
+        (0, 600_000, 100),
+        (300_000, 900_000, 60),              # clipped to 600_000-900_000, keeps half
+        (100_000, 200_000, 40),              # contained in the first row
+        (1_000_000, 1_060_000, 10),
+        (1_000_000, 1_060_000, 30),          # duplicates: the largest count is kept
+        (1_000_000, 1_060_000, 20),
+        (2_000_000, 2_000_000 + MAX_INTERVAL_MS + 1, 500),  # too long
+    ]
+    cleaned, report = clean_intervals(frame(rows))
+    assert report == CleanReport(rows_in=7, too_long=1, duplicates=2, contained=1, clipped=1,
+                                 steps_removed=500 + 10 + 20 + 40 + 30)
+    assert report.rows_dropped == 4
+    assert cleaned.values.tolist() == [[0, 600_000, 100], [600_000, 900_000, 30], [1_000_000, 1_060_000, 30]]
+    assert sum(r[2] for r in rows) - cleaned["_steps"].sum() == report.steps_removed
+
+
+def test_covered_until_applies_to_every_row():
+    rows = [(0, 100_000, 10), (50_000, 300_000, 50), (400_000, 500_000, 7)]
+    cleaned, report = clean_intervals(frame(rows), covered_until=200_000)
+    assert (report.contained, report.clipped) == (1, 1)
+    assert cleaned.values.tolist() == [[200_000, 300_000, 20], [400_000, 500_000, 7]]
+
+
+def test_reports_add_up():
+    total = CleanReport(3, 1, 0, 1, 0, 5) + CleanReport(4, 0, 2, 0, 1, 6)
+    assert total == CleanReport(7, 1, 2, 1, 1, 11)
+    assert total.summary() == "4 of 7 rows dropped (1 too long, 2 duplicate, 1 overlapped), 1 clipped, 11 steps removed"
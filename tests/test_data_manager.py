@@ -0,0 +1,99 @@
+from datetime import timedelta
+
+import numpy as np
+
+from data_manager import DataManager, DAY_RESOLUTIONS, spread_over_bins
+from conftest import ms
+
+
+def spread_by_loop(begin, end, steps, n_bins):
+    profile = np.zeros(n_bins)
+    for b, e, s in zip(begin, end, steps):
+        if e == b:
+            if 0 <= b < n_bins:
+                profile[int(np.floor(b))] += s
+            continue
+        for i in range(int(np.floor(b)), int(np.ceil(e))):
+            if 0 <= i < n_bins:
+                profile[i] += s * (min(e, i + 1) - max(b, i)) / (e - b)
+    return profile
+
+
+def test_spread_over_bins_matches_per_minute_loop():
+    rng = np.random.default_rng(7)
+    begin = rng.uniform(-30, 1440, 500)
+    end = begin + rng.choice([0, 0.25, 1, 7.5, 90], 500) * rng.uniform(0, 1, 500)
+    end[:20] = begin[:20]  # zero-length records
+    steps = rng.integers(0, 500, 500).astype(float)
+    assert np.allclose(spread_over_bins(begin, end, steps, 1440), spread_by_loop(begin, end, steps, 1440),
+                       rtol=0, atol=1e-9)
+
+
+def test_day_totals_match_day_bins(steps_db):
+    # Spans midnight: 3/4 of the steps belong to the first day.
+    path = steps_db([(ms(2024, 3, 1, 23, 30), ms(2024, 3, 2, 0, 10), 400), (ms(2024, 3, 2, 9), ms(2024, 3, 2, 9, 5), 50)])
+    data_manager = DataManager(path)
+    data_manager.load_and_process()
+    first = data_manager.available_dates[0]
+    assert data_manager.daily_values(first, first + timedelta(days=1)).tolist() == [300, 150]
+    for day in data_manager.available_dates:
+        for resolution in DAY_RESOLUTIONS:
+            assert round(data_manager.day_bins(day, resolution).sum()) == data_manager.daily_values(day, day)[0]
+
+
+def test_lazy_and_eager_loads_agree_across_year_boundaries(steps_db):
+    rows = [
+        (ms(2022, 12, 31, 23, 50), ms(2023, 1, 1, 0, 20), 300),
+        (ms(2023, 1, 1, 0, 0), ms(2023, 1, 1, 0, 10), 100),   # inside the row above
+        (ms(2023, 1, 1, 0, 10), ms(2023, 1, 1, 0, 40), 90),   # clipped by it
+        (ms(2024, 6, 1, 12), ms(2024, 6, 1, 12, 30), 1000),
+    ]
+    path = steps_db(rows)
+    eager = DataManager(path, use_store=False)
+    eager.load_and_process()
+    for order in ([2022, 2023], [2023, 2022]):
+        lazy = DataManager(path, lazy=True, use_store=False)
+        lazy.load_and_process()
+        for year in order:
+            lazy.ensure_year(year)
+        assert lazy.data_version == eager.data_version
+        assert np.array_equal(lazy.daily_array, eager.daily_array)
+
+
+def test_intervals_longer_than_a_day_are_dropped(steps_db):
+    rows = [
+        (ms(2024, 6, 1, 12), ms(2090, 1, 1), 5000),              # corrupt end time
+        (ms(2024, 6, 1, 12), ms(2024, 6, 1, 12, 30), 1000),
+        (ms(2024, 12, 31, 23), 2 ** 62, 7),                      # end near int64 max
+    ]
+    path = steps_db(rows)
+    eager = DataManager(path, use_store=False)
+    eager.load_and_process()
+    assert len(eager.bins) == 1 and eager.daily_array.tolist() == [1000]
+    assert eager.clean_report.too_long == 2 and eager.clean_report.steps_removed == 5007
+
+    lazy = DataManager(path, lazy=True, use_store=False)
+    lazy.load_and_process()
+    assert lazy.max_span_ms <= 24 * 60 * 60 * 1000
+    assert lazy.data_version == eager.data_version
+
+
+def test_lazy_load_skips_years_without_steps(steps_db):
+    rows = [
+        (ms(2023, 5, 1, 9), ms(2023, 5, 1, 9, 30), 800),
+        (ms(2024, 3, 1, 9), ms(2024, 3, 1, 9, 30), 500),
+        (ms(2025, 1, 2, 9), ms(2025, 1, 2, 9, 30), 0),
+    ]
+    path = steps_db(rows)
+    eager = DataManager(path, use_store=False)
+    eager.load_and_process()
+    lazy = DataManager(path, lazy=True, use_store=False)
+    lazy.load_and_process()
+    assert lazy.available_dates and lazy.loaded_years == {2024}
+    assert eager.years == lazy.years == [2023, 2024]
+
+    # Loading into a copy leaves the manager the views are reading untouched.
+    version = lazy.data_version
+    loaded = lazy.with_years([2023])
+    assert lazy.loaded_years == {2024} and lazy.data_version == version
+    assert loaded.fully_loaded and loaded.data_version == eager.data_version
@@ -0,0 +1,56 @@
+from db_diff import diff_databases
+from conftest import ms
+
+
+B = ms(2024, 5, 1, 8)
+
+
+def diff(steps_db, old_rows, new_rows):
+    return diff_databases(steps_db(old_rows, "old.db"), steps_db(new_rows, "new.db"))
+
+
+def counts(report):
+    return report.added, report.removed, report.changed
+
+
+def test_identical_databases(steps_db):
+    rows = [(B, B + 60_000, 10), (B, B + 60_000, 10), (B + 3_600_000, B + 3_660_000, 30)]
+    report = diff(steps_db, rows, rows)
+    assert counts(report) == (0, 0, 0) and report.days == []
+
+
+def test_empty_databases(steps_db):
+    assert counts(diff(steps_db, [], [])) == (0, 0, 0)
+    report = diff(steps_db, [], [(B, B + 60_000, 10)])
+    assert counts(report) == (1, 0, 0) and report.days[0].delta == 10
+    assert counts(diff(steps_db, [(B, B + 60_000, 10)], [])) == (0, 1, 0)
+
+
+def test_removing_one_of_two_rows_with_the_same_begin(steps_db):
+    report = diff(steps_db, [(B, B + 60_000, 10), (B, B + 120_000, 20)], [(B, B + 120_000, 20)])
+    assert counts(report) == (0, 1, 0)
+    assert report.days[0].delta == -10
+
+
+def test_edited_rows_are_changed_not_replaced(steps_db):
+    old = [(B, B + 60_000, 10), (B + 600_000, B + 660_000, 30)]
+    new = [(B, B + 90_000, 10), (B + 600_000, B + 660_000, 35), (B + 900_000, B + 960_000, 5)]
+    assert counts(diff(steps_db, old, new)) == (1, 0, 2)
+
+
+def test_swapped_step_counts_are_detected(steps_db):
+    # Same row count and step sum on the day; only the per-row hash tells them apart.
+    old = [(B, B + 60_000, 10), (B + 600_000, B + 660_000, 30)]
+    new = [(B, B + 60_000, 30), (B + 600_000, B + 660_000, 10)]
+    report = diff(steps_db, old, new)
+    assert counts(report) == (0, 0, 2)
+    assert report.days[0].delta == 0
+
+
+def test_only_changed_days_are_reported_as_raw_sums(steps_db):
+    next_day = B + 86_400_000
+    old = [(B, B + 60_000, 10), (next_day, next_day + 60_000, 20)]
+    new = [(B, B + 60_000, 10), (next_day, next_day + 60_000, 25)]
+    report = diff(steps_db, old, new)
+    assert [(d.old_steps, d.new_steps) for d in report.days] == [(20, 25)]
+    assert "raw row sums" in report.summary()
@@ -0,0 +1,13 @@
+from PyQt6.QtWidgets import QTextEdit
+
+from ui.log_buffer import LogBuffer
+
+
+def test_skipped_lines_notice_survives_the_line_limit(qapp):
+    widget = QTextEdit()
+    buffer = LogBuffer(widget, max_lines=5)
+    buffer.timer.stop()
+    for i in range(12):
+        buffer.append(f"line {i}")
+    buffer.flush()
+    assert widget.toPlainText().splitlines() == ["... 7 line(s) skipped ..."] + [f"line {i}" for i in range(7, 12)]
@@ -0,0 +1,65 @@
+import time
+
+import numpy as np
+import pytest
+
+from render_pipeline import RenderJob, RenderPipeline, RenderWorker
+
+MONTH_ARGS = (2024, 5, np.arange(31))
+
+
+def wait_until(qapp, condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        qapp.processEvents()
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def pipeline(qapp):
+    pipeline = RenderPipeline()
+    pipeline.results = []
+    pipeline.finished.connect(pipeline.results.append)
+    yield pipeline
+    pipeline.stop()
+
+
+def test_worker_skips_jobs_that_are_already_stale(qapp):
+    worker = RenderWorker({0: 2})
+    results = []
+    worker.rendered.connect(results.append)
+    worker.render(RenderJob(0, 1, "month", MONTH_ARGS, 400, 300, 100))
+    assert results == []
+    worker.render(RenderJob(0, 2, "month", MONTH_ARGS, 400, 300, 100))
+    (result,) = results
+    assert (result.page, result.generation) == (0, 2)
+    assert (result.image.width(), result.image.height()) == (400, 300)
+    x0, y0, x1, y1 = result.axes_box
+    assert 0 <= x0 < x1 <= 400 and 0 <= y0 < y1 <= 300
+
+
+def test_submit_snapshots_arguments(pipeline):
+    jobs = []
+    pipeline.submitted.connect(jobs.append)
+    values = np.arange(31)
+    pipeline.submit(1, "month", (2024, 5, values), 400, 300, 100)
+    values[:] = 0
+    snapshot = jobs[0].args[2]
+    assert snapshot.tolist() == list(range(31)) and not snapshot.flags.writeable
+
+
+def test_only_the_latest_render_of_a_page_is_delivered(qapp, pipeline):
+    for count in (10, 20, 30):
+        pipeline.submit(0, "month", (2024, 5, np.full(31, count)), 400, 300, 100)
+    pipeline.submit(1, "month", MONTH_ARGS, 400, 300, 100)
+    pipeline.invalidate(1)
+    pipeline.submit(2, "month", MONTH_ARGS, 400, 300, 100)
+    wait_until(qapp, lambda: {r.page for r in pipeline.results} >= {0, 2})
+    wait_until(qapp, lambda: False, timeout=0.3)  # let any stale results arrive
+    assert sorted((r.page, r.generation) for r in pipeline.results) == [(0, 3), (2, 1)]
+
+    # A result that finishes after its page was invalidated is dropped too.
+    late = next(r for r in pipeline.results if r.page == 2)
+    pipeline.invalidate(2)
+    pipeline.on_rendered(late)
+    assert len(pipeline.results) == 2
@@ -0,0 +1,59 @@
+from datetime import date
+
+import numpy as np
+
+import step_stats
+from step_stats import StepStats, compute_year_stats, goal_runs
+
+
+def test_goal_runs():
+    starts, lengths = goal_runs(np.array([12000, 10000, 500, 11000, 0, 10500, 10500, 10500]), 10000)
+    assert starts.tolist() == [0, 3, 5] and lengths.tolist() == [2, 1, 3]
+    starts, lengths = goal_runs(np.array([1, 2, 3]), 10000)
+    assert len(starts) == len(lengths) == 0
+
+
+def test_best_week_is_clipped_to_the_year():
+    # 2021 starts on a Friday, so its first Monday-based week holds Jan 1-3 only.
+    values = np.zeros(365, dtype=np.int64)
+    values[:3] = 20000
+    values[10] = 30000
+    stats = compute_year_stats(2021, date(2021, 1, 1), date(2021, 12, 31), values)
+    assert stats.best_week == (date(2021, 1, 1), 60000)
+    assert stats.best_day == (date(2021, 1, 11), 30000)
+    assert stats.monthly_totals[0] == 90000 and stats.best_month == (1, 90000)
+
+
+def test_weekday_means_only_cover_days_with_data():
+    # Data from Monday 2024-12-30 to Tuesday 2024-12-31; the rest of 2024 lies outside it.
+    values = np.zeros(366, dtype=np.int64)
+    values[-2:] = [7000, 3000]
+    stats = compute_year_stats(2024, date(2024, 12, 30), date(2025, 1, 5), values)
+    assert stats.weekday_means == [7000, 3000, 0, 0, 0, 0, 0]
+    assert stats.active_days == 2 and stats.daily_mean == 5000
+
+
+def test_unchanged_years_are_not_recomputed(monkeypatch):
+    calls = []
+    real = step_stats.compute_year_stats
+
+    def counting(year, *args):
+        calls.append(year)
+        return real(year, *args)
+
+    monkeypatch.setattr(step_stats, "compute_year_stats", counting)
+
+    stats = StepStats()
+    first_day = date(2023, 12, 30)
+    daily = np.full(5, 12000, dtype=np.int64)          # 2023-12-30 .. 2024-01-03
+    stats.update(first_day, daily)
+    assert calls == [2023, 2024] and stats.longest_streak.length == 5
+
+    calls.clear()
+    stats.update(first_day, np.append(daily, 500))     # only 2024 changes
+    assert calls == [2024]
+    assert stats.current_streak.length == 0 and stats.longest_streak.length == 5
+
+    calls.clear()
+    stats.update(first_day, np.append(daily, 500))
+    assert calls == []
@@ -13,6 +13,7 @@ from PyQt6.QtCore import QThread, pyqtSignal, QTimer
 from PyQt6.QtGui import QIcon, QCloseEvent
 
 from adb_handler import AdbWorker
+from .log_buffer import LogBuffer
 
 
 class AdbSyncDialog(QDialog):
@@ -29,7 +30,7 @@ class AdbSyncDialog(QDialog):
         self.is_running = False
         self.refresh_on_finish = False  # Flag to fix thread crash
         self.init_ui()
-        self.log_output.append(
+        self.log_sink.append(
             "NOTE: ADB functions are tested on Linux. For Windows, ensure 'adb.exe' is in your system's PATH."
         )
         self.list_devices()
@@ -70,6 +71,7 @@ class AdbSyncDialog(QDialog):
         # Log Output
         self.log_output = QTextEdit()
         self.log_output.setReadOnly(True)
+        self.log_sink = LogBuffer(self.log_output, parent=self)
         layout.addWidget(self.log_output, 1)
 
         # Close button
@@ -87,7 +89,7 @@ class AdbSyncDialog(QDialog):
         self.worker = AdbWorker(command, *args)
         self.worker.moveToThread(self.worker_thread)
 
-        self.worker.log_message.connect(self.log_output.append)
+        self.worker.log_message.connect(self.log_sink.append)
         self.worker.devices_listed.connect(self.on_devices_listed)
         self.worker.wifi_connected.connect(self.on_wifi_connected)
         self.worker.pull_complete.connect(self.on_pull_complete)
@@ -101,7 +103,7 @@ class AdbSyncDialog(QDialog):
         self.worker_thread.start()
 
     def list_devices(self):
-        self.log_output.clear()
+        self.log_sink.clear()
         self.device_combo.clear()
         self.device_combo.setPlaceholderText("Scanning for devices...")
         self._start_worker("list_devices")
@@ -110,7 +112,7 @@ class AdbSyncDialog(QDialog):
         """Connects to a device directly via IP address."""
         ip = self.ip_input.text().strip()
         if not ip:
-            self.log_output.append("Error: Please enter the device's IP address and port.")
+            self.log_sink.append("Error: Please enter the device's IP address and port.")
             return
         self.refresh_on_finish = True
         self._start_worker("connect_wifi", ip)
@@ -118,7 +120,7 @@ class AdbSyncDialog(QDialog):
     def pull_db(self):
         device = self.device_combo.currentText()
         if not device:
-            self.log_output.append("Error: No device selected.")
+            self.log_sink.append("Error: No device selected.")
             return
         self._start_worker("pull_db_root", device)
 
@@ -131,21 +133,21 @@ class AdbSyncDialog(QDialog):
             self.device_combo.setCurrentIndex(0)
         else:
             self.device_combo.setPlaceholderText("No devices found")
-        self.log_output.append(f"Found {len(devices)} device(s).")
+        self.log_sink.append(f"Found {len(devices)} device(s).")
 
     def on_wifi_connected(self, device_ip):
         """Only logs the message. The refresh is now handled by on_worker_finished."""
-        self.log_output.append(
+        self.log_sink.append(
             f"Successfully connected to {device_ip}. Refreshing list..."
         )
 
     def on_pull_complete(self, local_path):
-        self.log_output.append("Sync complete!")
+        self.log_sink.append("Sync complete!")
         self.sync_successful.emit(local_path)
         self.accept()
 
     def on_error(self, error_message):
-        self.log_output.append(f"Error: {error_message}")
+        self.log_sink.append(f"Error: {error_message}")
         if not self.device_combo.count():
             self.device_combo.setPlaceholderText("Scan failed")
         self.refresh_on_finish = False
@@ -169,7 +171,7 @@ class AdbSyncDialog(QDialog):
 
     def closeEvent(self, a0: QCloseEvent | None) -> None:
         if self.is_running:
-            self.log_output.append("Cannot close: ADB operation in progress.")
+            self.log_sink.append("Cannot close: ADB operation in progress.")
             if a0:
                 a0.ignore()
         else:
@@ -0,0 +1,56 @@
+from PyQt6.QtWidgets import QLabel, QSizePolicy
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
+from PyQt6.QtGui import QPixmap
+
+
+class ChartView(QLabel):
+    """
+    Displays a chart rendered off the GUI thread. Keeps the axes geometry of
+    the last render so clicks can be reported in data coordinates.
+    """
+
+    clicked = pyqtSignal(float, float)
+    resized = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop)
+        self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+        self.setMinimumSize(200, 150)
+        self.result = None
+        self.resize_timer = QTimer(self)
+        self.resize_timer.setSingleShot(True)
+        self.resize_timer.setInterval(150)
+        self.resize_timer.timeout.connect(self.resized.emit)
+
+    def render_size(self):
+        """Returns (width, height, dpi) in device pixels for the next render."""
+        ratio = self.devicePixelRatioF()
+        return self.width() * ratio, self.height() * ratio, 100 * ratio
+
+    def set_result(self, result):
+        self.result = result
+        pixmap = QPixmap.fromImage(result.image)
+        pixmap.setDevicePixelRatio(self.devicePixelRatioF())
+        self.setPixmap(pixmap)
+
+    def clear(self):
+        self.result = None
+        super().clear()
+
+    def resizeEvent(self, a0):
+        super().resizeEvent(a0)
+        self.resize_timer.start()
+
+    def mousePressEvent(self, ev):
+        super().mousePressEvent(ev)
+        if self.result is None or ev is None:
+            return
+        ratio = self.devicePixelRatioF()
+        x, y = ev.position().x() * ratio, ev.position().y() * ratio
+        x0, y0, x1, y1 = self.result.axes_box
+        if not (x0 <= x <= x1 and y0 <= y <= y1):
+            return
+        (left, right), (bottom, top) = self.result.xlim, self.result.ylim
+        self.clicked.emit(left + (x - x0) / (x1 - x0) * (right - left),
+                          top + (y - y0) / (y1 - y0) * (bottom - top))
@@ -0,0 +1,128 @@
+from PyQt6.QtWidgets import (
+    QDialog,
+    QVBoxLayout,
+    QHBoxLayout,
+    QGridLayout,
+    QLabel,
+    QPushButton,
+    QLineEdit,
+    QPlainTextEdit,
+    QFileDialog,
+)
+from PyQt6.QtCore import QThread
+from PyQt6.QtGui import QCloseEvent, QFontDatabase
+
+from db_diff import DiffWorker
+
+
+class DatabaseDiffDialog(QDialog):
+    """Dialog for comparing two Steps.db snapshots row by row."""
+
+    def __init__(self, new_db_path="", parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Compare Databases")
+        self.setMinimumSize(600, 450)
+        self.worker_thread = None
+        self.worker = None
+        self.is_running = False
+        self.init_ui(new_db_path)
+
+    def init_ui(self, new_db_path):
+        layout = QVBoxLayout(self)
+
+        # Database Paths
+        paths_layout = QGridLayout()
+        self.old_input = QLineEdit()
+        self.new_input = QLineEdit(new_db_path)
+        old_browse_btn = QPushButton("Browse…")
+        old_browse_btn.clicked.connect(lambda: self.browse_db(self.old_input))
+        new_browse_btn = QPushButton("Browse…")
+        new_browse_btn.clicked.connect(lambda: self.browse_db(self.new_input))
+        paths_layout.addWidget(QLabel("Old:"), 0, 0)
+        paths_layout.addWidget(self.old_input, 0, 1)
+        paths_layout.addWidget(old_browse_btn, 0, 2)
+        paths_layout.addWidget(QLabel("New:"), 1, 0)
+        paths_layout.addWidget(self.new_input, 1, 1)
+        paths_layout.addWidget(new_browse_btn, 1, 2)
+        layout.addLayout(paths_layout)
+
+        self.result_view = QPlainTextEdit()
+        self.result_view.setReadOnly(True)
+        self.result_view.setFont(QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont))
+        self.status_label = QLabel("Ready")
+        layout.addWidget(self.result_view, 1)
+        layout.addWidget(self.status_label)
+
+        # Buttons
+        self.compare_btn = QPushButton("Compare")
+        self.compare_btn.setObjectName("ActionButton")
+        self.compare_btn.clicked.connect(self.start_diff)
+        self.close_btn = QPushButton("Close")
+        self.close_btn.clicked.connect(self.reject)
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+        button_layout.addWidget(self.compare_btn)
+        button_layout.addWidget(self.close_btn)
+        layout.addLayout(button_layout)
+        self.controls = [self.old_input, self.new_input, old_browse_btn, new_browse_btn,
+                         self.compare_btn, self.close_btn]
+
+    def browse_db(self, line_edit):
+        path, _ = QFileDialog.getOpenFileName(self, "Open Steps DB", line_edit.text(), "SQLite DB (*.db)")
+        if path:
+            line_edit.setText(path)
+
+    def start_diff(self):
+        old_path, new_path = self.old_input.text().strip(), self.new_input.text().strip()
+        if not old_path or not new_path:
+            self.status_label.setText("Error: Pick both an old and a new database.")
+            return
+        for control in self.controls:
+            control.setEnabled(False)
+        self.is_running = True
+        self.result_view.clear()
+        self.status_label.setText("Comparing...")
+
+        self.worker_thread = QThread()
+        self.worker = DiffWorker(old_path, new_path)
+        self.worker.moveToThread(self.worker_thread)
+        self.worker.finished.connect(self.on_finished)
+        self.worker.error.connect(self.on_error)
+        self.worker_thread.started.connect(self.worker.run)
+        for signal in (self.worker.finished, self.worker.error):
+            signal.connect(self.worker_thread.quit)
+            signal.connect(self.worker.deleteLater)
+        self.worker_thread.finished.connect(self.worker_thread.deleteLater)
+        self.worker_thread.start()
+
+    # --- Worker Result Slots ---
+
+    def on_finished(self, report):
+        self.stop_running()
+        self.result_view.setPlainText(report.summary())
+        self.status_label.setText("No differences." if not report.days else
+                                  f"{len(report.days):,} day(s) differ (raw row sums, before cleaning).")
+
+    def on_error(self, error_message):
+        self.stop_running()
+        self.status_label.setText(f"Error: {error_message}")
+
+    def stop_running(self):
+        self.is_running = False
+        for control in self.controls:
+            control.setEnabled(True)
+
+    def reject(self):
+        if self.is_running:
+            self.status_label.setText("Cannot close: comparison in progress.")
+            return
+        super().reject()
+
+    def closeEvent(self, a0: QCloseEvent | None) -> None:
+        if self.is_running:
+            self.status_label.setText("Cannot close: comparison in progress.")
+            if a0:
+                a0.ignore()
+        else:
+            if a0:
+                a0.accept()
@@ -0,0 +1,193 @@
+from PyQt6.QtWidgets import (
+    QDialog,
+    QVBoxLayout,
+    QHBoxLayout,
+    QLabel,
+    QDateEdit,
+    QPushButton,
+    QLineEdit,
+    QCheckBox,
+    QProgressBar,
+    QFileDialog,
+)
+from PyQt6.QtCore import QThread, QDate, pyqtSignal
+from PyQt6.QtGui import QCloseEvent
+
+from chart_export import ExportWorker, CHART_KINDS, build_export_tasks
+from data_manager import DataManager, YearLoadWorker
+
+
+class ChartExportDialog(QDialog):
+    """Dialog for exporting day, month and year charts for a date range."""
+
+    # Emitted with the DataManager copy that has every year loaded, for the viewer to reuse.
+    years_loaded = pyqtSignal(DataManager)
+
+    def __init__(self, data_manager, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Export Charts")
+        self.setMinimumWidth(450)
+        self.data_manager = data_manager
+        self.worker_thread = None
+        self.worker = None
+        self.load_thread = None
+        self.load_worker = None
+        self.export_args = None
+        self.is_running = False
+        self.failed = False
+        self.init_ui()
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+
+        # Date Range
+        dates = self.data_manager.available_dates
+        last = dates[-1] if dates else QDate.currentDate().toPyDate()
+        range_layout = QHBoxLayout()
+        self.start_edit = QDateEdit(calendarPopup=True)
+        self.start_edit.setDate(QDate(last.year, 1, 1))
+        self.end_edit = QDateEdit(calendarPopup=True)
+        self.end_edit.setDate(QDate(last.year, last.month, last.day))
+        range_layout.addWidget(QLabel("From:"))
+        range_layout.addWidget(self.start_edit)
+        range_layout.addWidget(QLabel("To:"))
+        range_layout.addWidget(self.end_edit)
+        layout.addLayout(range_layout)
+
+        # Chart Kinds
+        kinds_layout = QHBoxLayout()
+        self.kind_checks = {}
+        for kind in CHART_KINDS:
+            check = QCheckBox(kind.capitalize())
+            check.setChecked(True)
+            self.kind_checks[kind] = check
+            kinds_layout.addWidget(check)
+        kinds_layout.addStretch()
+        layout.addLayout(kinds_layout)
+
+        # Output Directory
+        dir_layout = QHBoxLayout()
+        self.dir_input = QLineEdit("charts")
+        browse_btn = QPushButton("Browse…")
+        browse_btn.clicked.connect(self.browse_dir)
+        dir_layout.addWidget(QLabel("Folder:"))
+        dir_layout.addWidget(self.dir_input, 1)
+        dir_layout.addWidget(browse_btn)
+        layout.addLayout(dir_layout)
+
+        self.progress_bar = QProgressBar()
+        self.status_label = QLabel("Ready")
+        layout.addWidget(self.progress_bar)
+        layout.addWidget(self.status_label)
+
+        # Buttons
+        self.export_btn = QPushButton("Export")
+        self.export_btn.setObjectName("ActionButton")
+        self.export_btn.clicked.connect(self.start_export)
+        self.close_btn = QPushButton("Close")
+        self.close_btn.clicked.connect(self.reject)
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+        button_layout.addWidget(self.export_btn)
+        button_layout.addWidget(self.close_btn)
+        layout.addLayout(button_layout)
+        self.controls = [self.start_edit, self.end_edit, self.dir_input, browse_btn, self.export_btn, self.close_btn,
+                         *self.kind_checks.values()]
+
+    def browse_dir(self):
+        path = QFileDialog.getExistingDirectory(self, "Export Charts To", self.dir_input.text())
+        if path:
+            self.dir_input.setText(path)
+
+    def start_export(self):
+        kinds = tuple(kind for kind, check in self.kind_checks.items() if check.isChecked())
+        start, end = self.start_edit.date().toPyDate(), self.end_edit.date().toPyDate()
+        if not kinds or start > end or not self.dir_input.text().strip():
+            self.status_label.setText("Error: Pick at least one chart type, a valid range and a folder.")
+            return
+        for control in self.controls:
+            control.setEnabled(False)
+        self.is_running = True
+        self.failed = False
+        self.progress_bar.setValue(0)
+        self.export_args = (self.dir_input.text().strip(), start, end, kinds)
+        if self.data_manager.fully_loaded:
+            self.start_render()
+            return
+
+        # Years lazy mode has not read yet are loaded into a copy on a worker first.
+        self.status_label.setText("Loading all years...")
+        self.load_thread = QThread()
+        self.load_worker = YearLoadWorker(self.data_manager, self.data_manager.row_years)
+        self.load_worker.moveToThread(self.load_thread)
+        self.load_worker.finished.connect(self.on_years_loaded)
+        self.load_worker.error.connect(self.on_load_error)
+        self.load_thread.started.connect(self.load_worker.run)
+        for signal in (self.load_worker.finished, self.load_worker.error):
+            signal.connect(self.load_thread.quit)
+            signal.connect(self.load_worker.deleteLater)
+        self.load_thread.finished.connect(self.load_thread.deleteLater)
+        self.load_thread.start()
+
+    def start_render(self):
+        # The chart data is snapshotted here, on the GUI thread, from a DataManager
+        # nothing modifies any more, so the render worker never shares it.
+        self.status_label.setText("Preparing charts...")
+        tasks = build_export_tasks(self.data_manager, *self.export_args)
+        if not tasks:
+            self.on_finished(0)
+            return
+
+        self.worker_thread = QThread()
+        self.worker = ExportWorker(tasks)
+        self.worker.moveToThread(self.worker_thread)
+        self.worker.progress.connect(self.on_progress)
+        self.worker.error.connect(self.on_error)
+        self.worker.finished.connect(self.on_finished)
+        self.worker_thread.started.connect(self.worker.run)
+        self.worker.finished.connect(self.worker_thread.quit)
+        self.worker.finished.connect(self.worker.deleteLater)
+        self.worker_thread.finished.connect(self.worker_thread.deleteLater)
+        self.worker_thread.start()
+
+    # --- Worker Result Slots ---
+
+    def on_years_loaded(self, data_manager):
+        self.data_manager = data_manager
+        self.years_loaded.emit(data_manager)
+        self.start_render()
+
+    def on_load_error(self, error_message):
+        self.on_error(error_message)
+        self.on_finished(0)
+
+    def on_progress(self, done, total):
+        self.progress_bar.setMaximum(total)
+        self.progress_bar.setValue(done)
+        self.status_label.setText(f"Rendered {done:,} of {total:,} charts...")
+
+    def on_error(self, error_message):
+        self.failed = True
+        self.status_label.setText(f"Error: {error_message}")
+
+    def on_finished(self, count):
+        self.is_running = False
+        for control in self.controls:
+            control.setEnabled(True)
+        if not self.failed:
+            self.status_label.setText(f"Exported {count:,} chart(s)." if count else "No data in the selected range.")
+
+    def reject(self):
+        if self.is_running:
+            self.status_label.setText("Cannot close: export in progress.")
+            return
+        super().reject()
+
+    def closeEvent(self, a0: QCloseEvent | None) -> None:
+        if self.is_running:
+            self.status_label.setText("Cannot close: export in progress.")
+            if a0:
+                a0.ignore()
+        else:
+            if a0:
+                a0.accept()
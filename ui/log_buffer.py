@@ -0,0 +1,53 @@
+from collections import deque
+
+from PyQt6.QtCore import QObject, QTimer
+from PyQt6.QtGui import QTextCursor
+
+
+class LogBuffer(QObject):
+    """
+    Ring-buffered log sink for a QTextEdit. Lines are queued as they arrive
+    and written to the widget in one batch per timer tick, and both the queue
+    and the widget keep at most `max_lines` lines plus a notice of how many
+    lines were skipped.
+    """
+
+    def __init__(self, widget, max_lines=2000, interval_ms=100, parent=None):
+        super().__init__(parent)
+        self.widget = widget
+        # One block more than the queue holds, so the skipped-lines notice is not evicted by the lines after it.
+        self.widget.document().setMaximumBlockCount(max_lines + 1)
+        self.pending = deque(maxlen=max_lines)
+        self.dropped = 0
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self.flush)
+        self.timer.start()
+
+    def append(self, text):
+        lines = str(text).splitlines() or [""]
+        overflow = len(self.pending) + len(lines) - self.pending.maxlen
+        if overflow > 0:
+            self.dropped += overflow
+        self.pending.extend(lines)
+
+    def flush(self):
+        if not self.pending:
+            return
+        lines = list(self.pending)
+        self.pending.clear()
+        if self.dropped:
+            lines.insert(0, f"... {self.dropped:,} line(s) skipped ...")
+            self.dropped = 0
+
+        cursor = QTextCursor(self.widget.document())
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        prefix = "" if self.widget.document().isEmpty() else "\n"
+        cursor.insertText(prefix + "\n".join(lines))
+        scrollbar = self.widget.verticalScrollBar()
+        scrollbar.setValue(scrollbar.maximum())
+
+    def clear(self):
+        self.pending.clear()
+        self.dropped = 0
+        self.widget.clear()
@@ -4,19 +4,20 @@ from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLa
 from PyQt6.QtCore import QDate, Qt
 from PyQt6.QtGui import QIcon
 
-import matplotlib
-matplotlib.use("QtAgg")
-from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
-
 from app_controller import AppController, ENGLISH_MONTHS_FULL
+from data_manager import DAY_RESOLUTIONS
 from .adb_dialog import AdbSyncDialog
+from .chart_view import ChartView
+from .export_dialog import ChartExportDialog
+from .diff_dialog import DatabaseDiffDialog
 
 class StepViewer(QMainWindow):
     def __init__(self, db_path="Steps.db"):
         super().__init__()
         self.controller = AppController(self)
         self.adb_dialog = None
+        self.export_dialog = None
+        self.diff_dialog = None
         self.init_ui()
         self.controller.load_database(db_path)
 
@@ -42,9 +43,17 @@ class StepViewer(QMainWindow):
         load_btn = QPushButton(" Load DB…")
         load_btn.setIcon(QIcon.fromTheme("document-open"))
         load_btn.clicked.connect(self.prompt_load_db)
+        self.export_btn = QPushButton(" Export Charts…")
+        self.export_btn.setIcon(QIcon.fromTheme("document-save-as"))
+        self.export_btn.clicked.connect(self.open_chart_export)
+        diff_btn = QPushButton(" Compare DB…")
+        diff_btn.setIcon(QIcon.fromTheme("edit-find-replace"))
+        diff_btn.clicked.connect(self.open_db_diff)
         top_bar_layout.addWidget(self.status_label)
         top_bar_layout.addWidget(sync_btn)
         top_bar_layout.addWidget(load_btn)
+        top_bar_layout.addWidget(self.export_btn)
+        top_bar_layout.addWidget(diff_btn)
         main_layout.addWidget(top_bar)
 
         # Page Stack
@@ -56,9 +65,11 @@ class StepViewer(QMainWindow):
         self.day_view = self.create_day_view()
         self.month_view = self.create_month_view()
         self.year_view = self.create_year_view()
+        self.calendar_view = self.create_calendar_view()
         self.stack.addWidget(self.day_view["widget"])
         self.stack.addWidget(self.month_view["widget"])
         self.stack.addWidget(self.year_view["widget"])
+        self.stack.addWidget(self.calendar_view["widget"])
 
         # Bottom Navigation
         nav_bar = QFrame()
@@ -73,10 +84,14 @@ class StepViewer(QMainWindow):
         btn_year = QPushButton(" Year")
         btn_year.setIcon(QIcon.fromTheme("view-calendar"))
         btn_year.clicked.connect(lambda: self.stack.setCurrentIndex(2))
+        btn_calendar = QPushButton(" Calendar")
+        btn_calendar.setIcon(QIcon.fromTheme("x-office-calendar"))
+        btn_calendar.clicked.connect(lambda: self.stack.setCurrentIndex(3))
         nav_layout.addStretch()
         nav_layout.addWidget(btn_day)
         nav_layout.addWidget(btn_month)
         nav_layout.addWidget(btn_year)
+        nav_layout.addWidget(btn_calendar)
         nav_layout.addStretch()
         main_layout.addWidget(nav_bar, 0, Qt.AlignmentFlag.AlignBottom)
 
@@ -90,17 +105,22 @@ class StepViewer(QMainWindow):
         self.day_date_edit = QDateEdit(calendarPopup=True)
         self.day_date_edit.setDate(QDate.currentDate())
         self.day_date_edit.dateChanged.connect(self.controller.draw_plots)
+        self.day_resolution_combo = QComboBox()
+        self.day_resolution_combo.addItems(["1 hour" if m == 60 else f"{m} min" for m in DAY_RESOLUTIONS])
+        self.day_resolution_combo.currentIndexChanged.connect(self.controller.draw_plots)
         control_layout.addWidget(prev_btn)
         control_layout.addWidget(self.day_date_edit)
         control_layout.addWidget(next_btn)
+        control_layout.addWidget(self.day_resolution_combo)
         layout.addLayout(control_layout)
         self.day_total_label = QLabel("Total Steps: 0")
         self.day_total_label.setObjectName("TotalStepsLabel")
         self.day_total_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        canvas = FigureCanvas(Figure(figsize=(5, 4)))
+        chart = ChartView()
+        chart.resized.connect(self.controller.draw_plots)
         layout.addWidget(self.day_total_label)
-        layout.addWidget(canvas)
-        return {"widget": widget, "canvas": canvas, "controls": [prev_btn, self.day_date_edit, next_btn]}
+        layout.addWidget(chart)
+        return {"widget": widget, "chart": chart, "controls": [prev_btn, self.day_date_edit, next_btn, self.day_resolution_combo]}
 
     def create_month_view(self):
         widget, layout = QWidget(), QVBoxLayout()
@@ -120,11 +140,12 @@ class StepViewer(QMainWindow):
         self.month_stats_label = QLabel("Total: 0 | Avg: 0")
         self.month_stats_label.setObjectName("TotalStepsLabel")
         self.month_stats_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        canvas = FigureCanvas(Figure(figsize=(5, 4)))
-        canvas.mpl_connect("pick_event", self.controller.on_pick_month_bar)
+        chart = ChartView()
+        chart.clicked.connect(self.controller.on_click_month_bar)
+        chart.resized.connect(self.controller.draw_plots)
         layout.addWidget(self.month_stats_label)
-        layout.addWidget(canvas)
-        return {"widget": widget, "canvas": canvas, "controls": [self.month_year_combo, self.month_month_combo]}
+        layout.addWidget(chart)
+        return {"widget": widget, "chart": chart, "controls": [self.month_year_combo, self.month_month_combo]}
 
     def create_year_view(self):
         widget, layout = QWidget(), QVBoxLayout()
@@ -139,23 +160,63 @@ class StepViewer(QMainWindow):
         self.year_stats_label = QLabel("Total: 0 | Avg: 0")
         self.year_stats_label.setObjectName("TotalStepsLabel")
         self.year_stats_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        canvas = FigureCanvas(Figure(figsize=(5, 4)))
+        self.year_details_label = QLabel()
+        self.year_details_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        chart = ChartView()
+        chart.resized.connect(self.controller.draw_plots)
         layout.addWidget(self.year_stats_label)
-        layout.addWidget(canvas)
-        return {"widget": widget, "canvas": canvas, "controls": [self.year_year_combo]}
+        layout.addWidget(chart)
+        layout.addWidget(self.year_details_label)
+        return {"widget": widget, "chart": chart, "controls": [self.year_year_combo]}
+
+    def create_calendar_view(self):
+        widget, layout = QWidget(), QVBoxLayout()
+        widget.setLayout(layout)
+        control_layout = QHBoxLayout()
+        self.calendar_year_combo = QComboBox()
+        self.calendar_year_combo.currentIndexChanged.connect(self.controller.draw_plots)
+        control_layout.addWidget(QLabel("Year:"))
+        control_layout.addWidget(self.calendar_year_combo)
+        control_layout.addStretch()
+        layout.addLayout(control_layout)
+        self.calendar_stats_label = QLabel("Active Days: 0")
+        self.calendar_stats_label.setObjectName("TotalStepsLabel")
+        self.calendar_stats_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        chart = ChartView()
+        chart.clicked.connect(self.controller.on_click_calendar_cell)
+        chart.resized.connect(self.controller.draw_plots)
+        layout.addWidget(self.calendar_stats_label)
+        layout.addWidget(chart)
+        return {"widget": widget, "chart": chart, "controls": [self.calendar_year_combo]}
+
+    def closeEvent(self, a0):
+        self.controller.render_pipeline.stop()
+        super().closeEvent(a0)
 
     def open_adb_sync(self):
         self.adb_dialog = AdbSyncDialog(self)
         self.adb_dialog.sync_successful.connect(self.controller.load_database)
         self.adb_dialog.exec()
 
+    def open_chart_export(self):
+        if not self.controller.data_manager.available_dates:
+            self.status_label.setText("Load a database before exporting charts.")
+            return
+        self.export_dialog = ChartExportDialog(self.controller.data_manager, self)
+        self.export_dialog.years_loaded.connect(self.controller.adopt_data_manager)
+        self.export_dialog.exec()
+
+    def open_db_diff(self):
+        self.diff_dialog = DatabaseDiffDialog(self.controller.data_manager.db_path or "", self)
+        self.diff_dialog.exec()
+
     def prompt_load_db(self):
         path, _ = QFileDialog.getOpenFileName(self, "Open Steps DB", "", "SQLite DB (*.db)")
         if path:
             self.controller.load_database(path)
 
     def set_ui_enabled(self, enabled):
-        for view in [self.day_view, self.month_view, self.year_view]:
+        for view in [self.day_view, self.month_view, self.year_view, self.calendar_view]:
             for control in view["controls"]:
                 control.setEnabled(enabled)
 